@@ -0,0 +1,103 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+from django.db.models import Q
+from django.http import Http404
+
+
+def keyset_filter(ordering: tuple, values: list) -> Q:
+    ahead = Q()
+    equal = Q()
+
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        ahead |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+
+    return ahead
+
+
+class KeysetPage:
+
+    def __init__(self, object_list: list, next_cursor: str = None,
+                 cursor: str = None, next_url: str = None,
+                 first_url: str = None) -> None:
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+        self.next_url = next_url
+        self.first_url = first_url
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginationMixin:
+    """ListView mixin: cursor pagination over a unique ordering."""
+
+    keyset_ordering = ('-created', '-id')
+    cursor_kwarg = 'cursor'
+
+    def encode_cursor(self, obj: object) -> str:
+        values = [
+            str(getattr(obj, field.lstrip('-')))
+            for field in self.keyset_ordering
+        ]
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor: str, model: object) -> list:
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.keyset_ordering, values)
+            ]
+        except (DecodeError, ValueError, TypeError, LookupError):
+            raise Http404('Неверный курсор страницы')
+
+    def get_page_url(self, cursor: str = None) -> str:
+        params = self.request.GET.copy()
+        params.pop(self.cursor_kwarg, None)
+        params.pop(self.page_kwarg, None)
+        if cursor:
+            params[self.cursor_kwarg] = cursor
+        return '?' + params.urlencode()
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get(self.cursor_kwarg)
+
+        if cursor:
+            values = self.decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(
+                keyset_filter(self.keyset_ordering, values)
+            )
+
+        rows = list(queryset.order_by(*self.keyset_ordering)[:page_size + 1])
+        object_list = rows[:page_size]
+        next_cursor = None
+
+        if len(rows) > page_size:
+            next_cursor = self.encode_cursor(object_list[-1])
+
+        page = KeysetPage(
+            object_list,
+            next_cursor=next_cursor,
+            cursor=cursor,
+            next_url=self.get_page_url(next_cursor),
+            first_url=self.get_page_url()
+        )
+        return (None, page, object_list, page.has_other_pages())
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class ChangelistQueriesMixin:
+    """Changelists run the same number of queries for 1 and for N rows.
+
+    Subclasses create rows numbered from start with their own related
+    objects in add_rows().
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='x'
+        )
+        self.client.force_login(self.admin)
+
+    def add_rows(self, start: int, count: int) -> None:
+        raise NotImplementedError
+
+    def assert_changelist_queries(self, model: object,
+                                  rows: int = 5) -> None:
+        url = reverse(
+            f'admin:{model._meta.app_label}_{model._meta.model_name}'
+            '_changelist'
+        )
+        self.add_rows(0, 1)
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.add_rows(1, rows - 1)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(response.context['cl'].result_count, rows)
@@ -1,38 +1,82 @@
 from ckeditor.widgets import CKEditorWidget
 from django import forms
-from django.contrib import admin
-from django.db import models
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db import models, transaction
+from django.db.models import Count
 from django.forms import Textarea
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 from nested_admin.nested import (NestedModelAdmin, NestedStackedInline,
                                  NestedTabularInline)
-from progress.models import Progress, UserSprint
-
-from .models import Category, Exam, Question, Sprint, Variant
+from progress.models import PurgeJob
+
+from .analysis import analyze_exam
+from .exports import EXPORT_CONTENT_TYPES, iter_export
+from .forms import ExamImportForm
+from .imports import ExamImportError, import_exams
+from .models import (Category, Exam, ExamAnalysis, Question, QuestionAnalysis,
+                     Sprint, Variant)
+
+
+def notify_purge_job(modeladmin, request, job):
+    modeladmin.message_user(
+        request,
+        format_html(
+            'Удаление прогресса поставлено в очередь ({} записей), '
+            'ход выполнения: <a href="{}">задача {}</a>',
+            job.total,
+            reverse('admin:progress_purgejob_change', args=(job.id,)),
+            job.id
+        ),
+        messages.SUCCESS
+    )
 
 
 @admin.action(description='Удалить связанный прогресс')
 def delete_exam_progress(modeladmin, request, queryset):
-    Progress.objects.filter(exam__in=queryset).delete()
+    job = PurgeJob.objects.enqueue(
+        'Тесты: ' + ', '.join(exam.title for exam in queryset),
+        exam_ids=[exam.id for exam in queryset],
+        author=request.user
+    )
+    notify_purge_job(modeladmin, request, job)
+
+
+@admin.action(description='Пересчитать анализ вопросов')
+def analyze_exams(modeladmin, request, queryset):
+    for exam in queryset:
+        analyze_exam(exam)
+
+
+@admin.action(description='Выгрузить тесты в zip-архив')
+def export_exams(modeladmin, request, queryset):
+    response = StreamingHttpResponse(
+        iter_export(Exam.objects.filter(id__in=queryset.values('id')), 'zip'),
+        content_type=EXPORT_CONTENT_TYPES['zip']
+    )
+    response['Content-Disposition'] = 'attachment; filename="exams.zip"'
+    return response
 
 
 @admin.action(description='Удалить связанный прогресс')
 def delete_sprint_progress(modeladmin, request, queryset):
-    UserSprint.objects.filter(sprint__in=queryset).delete()
+    job = PurgeJob.objects.enqueue(
+        'Спринты: ' + ', '.join(sprint.title for sprint in queryset),
+        sprint_ids=[sprint.id for sprint in queryset],
+        author=request.user
+    )
+    notify_purge_job(modeladmin, request, job)
 
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('title', 'description', 'exams_count', 'priority')
     list_editable = ('priority',)
     readonly_fields = ('slug', 'exams_count',)
-
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.prefetch_related('exams')
-
-    def exams_count(self, obj):
-        return obj.exams.filter(visibility=True, active=True).count()
-
-    exams_count.short_description = 'Тестирований'
+    search_fields = ('title',)
 
 
 class ExamInline(NestedStackedInline):
@@ -55,25 +99,28 @@ class ExamInline(NestedStackedInline):
 
 
 class SprintAdmin(NestedModelAdmin):
-    list_display = ('title', 'exams_count', 'created')
+    list_display = ('title', 'exams_total', 'created')
     inlines = (ExamInline,)
     save_on_top = True
     readonly_fields = ('created', 'slug')
+    search_fields = ('title',)
     actions = [delete_sprint_progress]
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.prefetch_related('exams')
+        return queryset.annotate(exams_total=Count('exams'))
 
-    def exams_count(self, obj):
-        return obj.exams.all().count()
+    def exams_total(self, obj):
+        return obj.exams_total
 
-    exams_count.short_description = 'Тестов'
+    exams_total.short_description = 'Тестов'
+    exams_total.admin_order_field = 'exams_total'
 
 
 class VariantInline(NestedTabularInline):
     model = Variant
     extra = 1
+    max_num = Variant.MAX_PER_QUESTION
     formfield_overrides = {
         models.TextField: {'widget': Textarea(attrs={'rows': 2, 'cols': 60})},
     }
@@ -83,7 +130,7 @@ class QuestionInline(NestedStackedInline):
     model = Question
     show_change_link = True
     extra = 1
-    readonly_fields = ('active', 'variants_count')
+    readonly_fields = ('active', 'variants_total')
     formfield_overrides = {
         models.TextField: {'widget': Textarea(attrs={'rows': 4, 'cols': 40})},
     }
@@ -91,43 +138,115 @@ class QuestionInline(NestedStackedInline):
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.prefetch_related('variants')
+        return queryset.annotate(variants_total=Count('variants'))
 
-    def variants_count(self, obj):
-        return obj.variants.all().count()
+    def variants_total(self, obj):
+        return getattr(obj, 'variants_total', 0)
 
-    variants_count.short_description = 'Вариантов ответа'
+    variants_total.short_description = 'Вариантов ответа'
 
 
 class ExamAdmin(NestedModelAdmin):
     list_display = ('title', 'category', 'author', 'revision',
-                    'questions_count', 'active', 'visibility', 'created')
+                    'questions_total', 'active', 'visibility', 'created')
     list_editable = ('visibility',)
+    list_select_related = ('category', 'author')
     readonly_fields = ('author', 'slug', 'active',
-                       'revision', 'questions_count', 'created')
+                       'revision', 'questions_total', 'created')
+    show_full_result_count = False
 
     inlines = (QuestionInline,)
     save_on_top = True
     raw_id_fields = ('sprint',)
+    autocomplete_fields = ('category',)
     description = forms.CharField(widget=CKEditorWidget())
-    actions = [delete_exam_progress]
+    actions = [delete_exam_progress, analyze_exams, export_exams]
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.prefetch_related('questions').prefetch_related(
-            'category', 'author',)
+        return queryset.annotate(questions_total=Count('questions'))
 
-    def questions_count(self, obj):
-        return obj.questions.all().count()
+    def questions_total(self, obj):
+        return getattr(obj, 'questions_total', 0)
 
-    questions_count.short_description = 'Вопросов'
+    questions_total.short_description = 'Вопросов'
+    questions_total.admin_order_field = 'questions_total'
 
     def save_model(self, request, obj, form, change):
         if getattr(obj, 'author', None) is None:
             obj.author = request.user
         obj.save()
 
+    def get_urls(self):
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='exams_exam_import'
+            )
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = ExamImportForm(request.POST or None, request.FILES or None)
+
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                with transaction.atomic():
+                    stats = import_exams(
+                        upload, form.cleaned_data['format'],
+                        upload.name.rsplit('.', 1)[0],
+                        category=form.cleaned_data['category'],
+                        sprint=form.cleaned_data['sprint'],
+                        visibility=form.cleaned_data['visibility'],
+                        author=request.user
+                    )
+            except ExamImportError as error:
+                form.add_error('file', str(error))
+            else:
+                self.message_user(
+                    request,
+                    f'Импортировано тестов: {stats["exams"]}, '
+                    f'вопросов: {stats["questions"]}, '
+                    f'пропущено вопросов: {stats["skipped"]}',
+                    messages.SUCCESS
+                )
+                return redirect('admin:exams_exam_changelist')
+
+        return TemplateResponse(request, 'admin/exams/exam/import.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Импорт тестов',
+            'form': form
+        })
+
+
+class QuestionAnalysisInline(admin.TabularInline):
+    model = QuestionAnalysis
+    extra = 0
+    fields = ('question', 'attempts', 'difficulty', 'discrimination',
+              'distractors')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class ExamAnalysisAdmin(admin.ModelAdmin):
+    list_display = ('exam', 'exam_revision', 'attempts', 'alpha', 'updated')
+    list_select_related = ('exam',)
+    readonly_fields = ('exam', 'exam_revision', 'attempts', 'alpha',
+                       'updated')
+    inlines = (QuestionAnalysisInline,)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Sprint, SprintAdmin)
 admin.site.register(Exam, ExamAdmin)
+admin.site.register(ExamAnalysis, ExamAnalysisAdmin)
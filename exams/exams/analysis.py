@@ -0,0 +1,168 @@
+from collections import defaultdict
+from math import sqrt
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from progress.models import Progress, UserAnswer, UserVariant
+
+from .models import ExamAnalysis, QuestionAnalysis, Variant
+
+CHUNK_SIZE = 5000
+
+
+class ItemStats:
+    """Running sums for one question over the finished attempts."""
+
+    def __init__(self) -> None:
+        self.attempts = 0
+        self.correct = 0
+        self.rest_sum = 0
+        self.rest_squares = 0
+        self.correct_rest = 0
+
+    def add(self, correct: int, total: int) -> None:
+        rest = total - correct
+        self.attempts += 1
+        self.correct += correct
+        self.rest_sum += rest
+        self.rest_squares += rest * rest
+        self.correct_rest += rest * correct
+
+    @property
+    def difficulty(self) -> float:
+        return self.correct / self.attempts
+
+    @property
+    def discrimination(self) -> float or None:
+        n = self.attempts
+        numerator = n * self.correct_rest - self.correct * self.rest_sum
+        denominator = sqrt(
+            (n * self.correct - self.correct ** 2)
+            * (n * self.rest_squares - self.rest_sum ** 2)
+        )
+        if not denominator:
+            return None
+        return numerator / denominator
+
+
+def get_alpha(items: dict, attempts: int, total: int,
+              squares: int) -> float or None:
+    count = len(items)
+    if count < 2 or not attempts:
+        return None
+
+    total_variance = squares / attempts - (total / attempts) ** 2
+    if not total_variance:
+        return None
+
+    items_variance = sum(
+        item.correct / attempts * (1 - item.correct / attempts)
+        for item in items.values()
+    )
+    return count / (count - 1) * (1 - items_variance / total_variance)
+
+
+def get_distractors(variants: list, item: ItemStats,
+                    selections: dict) -> list:
+    distractors = []
+
+    for variant_id, text, correct in variants:
+        selected, score = selections.get(variant_id, (0, 0))
+        distractors.append({
+            'variant_id': variant_id,
+            'text': text,
+            'correct': correct,
+            'selected_count': selected,
+            'selection_rate': round(selected / item.attempts, 4),
+            'mean_score': round(score / selected, 4) if selected else None
+        })
+    return distractors
+
+
+def get_rounded(value: float or None) -> float or None:
+    return None if value is None else round(value, 4)
+
+
+def analyze_exam(exam: object, revision: object = None) -> ExamAnalysis:
+    revision = exam.revision if revision is None else revision
+    progression = Progress.objects.filter(
+        exam=exam, exam_revision=revision, finished__isnull=False
+    )
+    totals = progression.aggregate(
+        attempts=Count('id'),
+        total=Sum('correct_count'),
+        squares=Sum(F('correct_count') * F('correct_count'))
+    )
+    items = defaultdict(ItemStats)
+    selections = defaultdict(lambda: [0, 0])
+
+    for question_id, correct, total in (
+        UserAnswer.objects
+        .filter(progress__in=progression, question__isnull=False)
+        .values_list('question_id', 'correct', 'progress__correct_count')
+        .iterator(chunk_size=CHUNK_SIZE)
+    ):
+        items[question_id].add(int(bool(correct)), total)
+
+    for variant_id, total in (
+        UserVariant.objects
+        .filter(
+            answer__progress__in=progression,
+            variant__isnull=False,
+            selected=True
+        )
+        .values_list('variant_id', 'answer__progress__correct_count')
+        .iterator(chunk_size=CHUNK_SIZE)
+    ):
+        selections[variant_id][0] += 1
+        selections[variant_id][1] += total
+
+    for variant_ids, selected_mask, total in (
+        UserAnswer.objects
+        .filter(progress__in=progression, selected_mask__gt=0)
+        .values_list(
+            'variant_ids', 'selected_mask', 'progress__correct_count'
+        )
+        .iterator(chunk_size=CHUNK_SIZE)
+    ):
+        for position, variant_id in enumerate(variant_ids):
+            if selected_mask >> position & 1:
+                selections[variant_id][0] += 1
+                selections[variant_id][1] += total
+
+    variants = defaultdict(list)
+    for question_id, *variant in (
+        Variant.objects
+        .filter(question_id__in=items)
+        .order_by('priority', 'id')
+        .values_list('question_id', 'id', 'text', 'correct')
+    ):
+        variants[question_id].append(variant)
+
+    with transaction.atomic():
+        analysis, _ = ExamAnalysis.objects.update_or_create(
+            exam=exam,
+            exam_revision=revision,
+            defaults={
+                'attempts': totals['attempts'],
+                'alpha': get_rounded(get_alpha(
+                    items, totals['attempts'], totals['total'] or 0,
+                    totals['squares'] or 0
+                ))
+            }
+        )
+        analysis.questions.all().delete()
+        QuestionAnalysis.objects.bulk_create([
+            QuestionAnalysis(
+                analysis=analysis,
+                question_id=question_id,
+                attempts=item.attempts,
+                difficulty=get_rounded(item.difficulty),
+                discrimination=get_rounded(item.discrimination),
+                distractors=get_distractors(
+                    variants[question_id], item, selections
+                )
+            )
+            for question_id, item in items.items()
+        ])
+    return analysis
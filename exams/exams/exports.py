@@ -0,0 +1,175 @@
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Exam, Question, Variant
+
+EXPORT_FORMATS = ('ndjson', 'zip')
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'zip': 'application/zip'
+}
+
+EXPORT_VERSION = 1
+
+EXAM_FIELDS = (
+    'id', 'title', 'description', 'success_message', 'revision', 'timer',
+    'required_percent', 'allow_retesting', 'show_results', 'only_guest_keys',
+    'show_correct', 'shuffle_variants', 'empty_answers', 'single_page',
+    'priority', 'visibility'
+)
+
+QUESTION_FIELDS = (
+    'id', 'exam_id', 'text', 'type', 'description', 'success_message',
+    'priority', 'visibility'
+)
+
+VARIANT_FIELDS = ('question_id', 'text', 'correct', 'priority')
+
+
+@contextmanager
+def repeatable_read() -> object:
+    """One read-only snapshot for every query of the export."""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql' and not connection.savepoint_ids:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ '
+                    'READ ONLY'
+                )
+        yield
+
+
+def get_export_queryset(exam_ids: list = None, category_id: int = None,
+                        sprint_id: int = None) -> object:
+    exams = Exam.objects.all()
+
+    if exam_ids:
+        exams = exams.filter(id__in=exam_ids)
+    if category_id:
+        exams = exams.filter(category_id=category_id)
+    if sprint_id:
+        exams = exams.filter(sprint_id=sprint_id)
+    return exams
+
+
+def attach_questions(exams: list) -> list:
+    questions = {exam['id']: [] for exam in exams}
+    variants = defaultdict(list)
+    rows = list(
+        Question.objects
+        .filter(exam_id__in=questions)
+        .order_by('exam_id', 'priority', 'id')
+        .values(*QUESTION_FIELDS)
+    )
+
+    for variant in (
+        Variant.objects
+        .filter(question_id__in=[row['id'] for row in rows])
+        .order_by('priority', 'id')
+        .values(*VARIANT_FIELDS)
+    ):
+        variants[variant.pop('question_id')].append(variant)
+
+    for question in rows:
+        question['variants'] = variants[question.pop('id')]
+        questions[question.pop('exam_id')].append(question)
+
+    for exam in exams:
+        if exam['revision']:
+            exam['revision'] = exam['revision'].isoformat()
+        exam['category'] = exam.pop('category_title')
+        exam['sprint'] = exam.pop('sprint_title')
+        exam['questions'] = questions[exam.pop('id')]
+    return exams
+
+
+def iter_exams(queryset: object, chunk_size: int = 200) -> object:
+    chunk = []
+
+    for exam in (
+        queryset
+        .order_by('id')
+        .values(
+            *EXAM_FIELDS,
+            category_title=F('category__title'),
+            sprint_title=F('sprint__title')
+        )
+        .iterator(chunk_size=chunk_size)
+    ):
+        chunk.append(exam)
+
+        if len(chunk) >= chunk_size:
+            yield from attach_questions(chunk)
+            chunk = []
+
+    if chunk:
+        yield from attach_questions(chunk)
+
+
+def iter_ndjson(exams: object) -> object:
+    for exam in exams:
+        yield json.dumps(
+            exam, cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
+
+
+class ZipBuffer:
+    """Write-only sink for ZipFile, drained after every member write."""
+
+    def __init__(self) -> None:
+        self.chunks = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(exams: object) -> object:
+    buffer = ZipBuffer()
+    count = 0
+
+    member_info = ZipInfo('exams.ndjson', timezone.now().timetuple()[:6])
+    member_info.compress_type = ZIP_DEFLATED
+
+    with ZipFile(buffer, 'w', ZIP_DEFLATED) as archive:
+        with archive.open(member_info, 'w', force_zip64=True) as member:
+            for line in iter_ndjson(exams):
+                member.write(line.encode())
+                count += 1
+                data = buffer.pop()
+                if data:
+                    yield data
+
+        archive.writestr('manifest.json', json.dumps({
+            'version': EXPORT_VERSION,
+            'created': timezone.now(),
+            'exams_count': count
+        }, cls=DjangoJSONEncoder))
+    yield buffer.pop()
+
+
+def iter_export(queryset: object, export_format: str,
+                chunk_size: int = 200) -> object:
+    with repeatable_read():
+        exams = iter_exams(queryset, chunk_size)
+
+        if export_format == 'zip':
+            yield from iter_zip(exams)
+        else:
+            yield from iter_ndjson(exams)
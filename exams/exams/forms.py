@@ -1,7 +1,9 @@
 from django import forms
 from django.forms import ValidationError
 
-from progress.models import UserAnswer, UserVariant
+from .grading import VariantSet, save_answer, save_answers
+from .imports import IMPORT_FORMATS, get_import_format
+from .models import Category, Sprint
 
 
 class ExamProcessForm(forms.Form):
@@ -14,20 +16,17 @@ class ExamProcessForm(forms.Form):
             return
 
         self.question = self.initial.get('question')
+        self.exam = self.initial.get('exam')
         self.progress = self.initial.get('progress')
         self.user = self.initial.get('user')
-        self.variants = self.initial.get('variants')
+        self.variants = list(self.question.variants)
 
-        if self.question.exam.shuffle_variants:
-            self.variants = self.variants.order_by('?')
-
-        if self.question.text_answer:
-            value = 'text'
-        else:
-            value = 'id'
+        if self.exam.shuffle_variants:
+            self.variants = self.progress.shuffled(
+                self.variants, self.question.id
+            )
 
-        self.corrected = self.variants.filter(
-            correct=True).values_list(value, flat=True)
+        self.variant_set = VariantSet(self.question.type, self.variants)
         self.add_variants_fields(self.variants)
 
     def add_variants_fields(self, variants_list: list) -> None:
@@ -57,112 +56,145 @@ class ExamProcessForm(forms.Form):
         if (
             self.question.many_correct
             and len(v_count) == len(self.cleaned_data.keys())
-            and self.question.exam.empty_answers is False
+            and self.exam.empty_answers is False
         ):
             raise ValidationError('Выберите хотя бы один вариант ответа')
         return self.cleaned_data
 
-    def add_results(
-            self,
-            results: list,
-            correct: bool,
-            no_answers: bool = False
-    ) -> None:
-        answer = UserAnswer.objects.create(
-            progress=self.progress,
-            question=self.question,
-            correct=correct,
+    def add_results(self, results: list, no_answers: bool = False) -> None:
+        save_answer(
+            self.progress, self.question, self.variant_set, results,
             no_answers=no_answers
         )
-        for_create = []
-
-        for variant in self.variants:
-            selected = False
-            corrected = False
-
-            if self.question.text_answer:
-                if results[0].lower() == variant.text.lower():
-                    selected = True
-
-                if variant.text in self.corrected:
-                    corrected = True
-            else:
-                if variant.id in results:
-                    selected = True
-
-                if variant.id in self.corrected:
-                    corrected = True
-
-            for_create.append(
-                UserVariant(
-                    answer=answer,
-                    variant=variant,
-                    variant_text=variant.text,
-                    selected=selected,
-                    correct=corrected,
-                )
-            )
 
-        if self.question.text_answer and correct is False:
-            for_create.append(
-                UserVariant(
-                    answer=answer,
-                    variant_text=results[0],
-                    selected=True,
-                    correct=False,
-                )
-            )
+    def answer_with_one_correct(self):
+        self.add_results([int(self.cleaned_data.get('result'))])
 
-        UserVariant.objects.bulk_create(for_create)
+    def answer_with_many_correct(self):
+        results = [
+            int(variant_id) for variant_id, status
+            in self.cleaned_data.items() if status is True
+        ]
+        self.add_results(results, no_answers=not results)
 
-    def answer_with_one_correct(self):
-        correct = True
-        result = [int(self.cleaned_data.get('result'))]
-        variant = self.variants.filter(id=result[0], correct=True)
+    def answer_with_text_answer(self):
+        self.add_results([self.cleaned_data.get('answer')])
 
-        if not variant.exists():
-            correct = False
 
-        if result:
-            self.add_results(result, correct)
+class ExamSinglePageForm(forms.Form):
 
-    def answer_with_many_correct(self):
-        correct = True
-        results = []
-
-        for variant_id in self.cleaned_data:
-            status = self.cleaned_data.get(variant_id)
-            if status is True:
-                results.append(int(variant_id))
-
-        if self.question.exam.empty_answers and not results:
-            variants = self.variants.filter(
-                question=self.question,
-                correct=True
+    def __init__(self, *args, **kwargs):
+        super(ExamSinglePageForm, self).__init__(*args, **kwargs)
+        self.progress = self.initial.get('progress')
+        self.exam = self.initial.get('exam')
+        self.questions = self.initial.get('questions')
+        self.variant_sets = {}
+        self.fields_names = {}
+
+        for question, variants in self.questions:
+            self.variant_sets[question.id] = VariantSet(
+                question.type, variants
+            )
+            self.fields_names[question.id] = self.add_question_fields(
+                question, variants
+            )
+
+    def add_question_fields(self, question: object, variants: list) -> list:
+        prefix = f'{question.id}-'
+        fields = {}
+
+        if question.many_correct:
+            for variant in variants:
+                fields[prefix + str(variant.id)] = forms.BooleanField(
+                    label=variant.text,
+                    required=False
+                )
+
+        if question.one_correct:
+            radios = [(str(variant.id), variant.text) for variant in variants]
+            fields[prefix + 'result'] = forms.ChoiceField(
+                widget=forms.RadioSelect(
+                    attrs={'class': 'form-check-input'}),
+                choices=radios,
             )
-            if variants.exists():
-                correct = False
-            self.add_results(results, correct, no_answers=True)
 
-        uncorrects = self.variants.filter(id__in=results, correct=False)
-        corrects_count = self.variants.filter(
-            question=self.question,
-            correct=True
-        ).count()
+        if question.text_answer:
+            fields[prefix + 'answer'] = forms.CharField(max_length=200)
 
-        if uncorrects.exists() or len(results) < corrects_count:
-            correct = False
+        self.fields.update(fields)
+        return list(fields)
 
-        if results:
-            self.add_results(results, correct)
+    @property
+    def questions_fields(self) -> list:
+        return [
+            (question, [self[name] for name in self.fields_names[question.id]])
+            for question, _ in self.questions
+        ]
 
-    def answer_with_text_answer(self):
-        correct = True
-        answer = [self.cleaned_data.get('answer')]
-        variant = self.variants.filter(text__iexact=answer[0], correct=True)
+    def get_results(self, question: object) -> list:
+        names = self.fields_names[question.id]
 
-        if not variant.exists():
-            correct = False
+        if question.many_correct:
+            return [
+                int(name.split('-')[1]) for name in names
+                if self.cleaned_data.get(name) is True
+            ]
+        if question.one_correct:
+            return [int(self.cleaned_data.get(names[0]))]
+        return [self.cleaned_data.get(names[0])]
 
-        if answer:
-            self.add_results(answer, correct)
+    def clean(self):
+        if self.errors or self.exam.empty_answers:
+            return self.cleaned_data
+
+        for number, (question, _) in enumerate(self.questions, start=1):
+            if question.many_correct and not self.get_results(question):
+                raise ValidationError(
+                    f'Выберите хотя бы один вариант ответа в вопросе {number}'
+                )
+        return self.cleaned_data
+
+    def add_results(self) -> list:
+        submissions = []
+
+        for question, _ in self.questions:
+            results = self.get_results(question)
+            submissions.append((
+                question, self.variant_sets[question.id], results,
+                question.many_correct and not results
+            ))
+        return save_answers(self.progress, submissions)
+
+
+class ExamImportForm(forms.Form):
+    file = forms.FileField(label='Файл')
+    format = forms.ChoiceField(
+        label='Формат',
+        help_text='По умолчанию определяется по расширению файла',
+        choices=(
+            [('', '---------')] + [(name, name) for name in IMPORT_FORMATS]
+        ),
+        required=False
+    )
+    category = forms.ModelChoiceField(
+        Category.objects.all(),
+        label='Категория',
+        help_text='Для тестов, у которых она не указана в файле',
+        required=False
+    )
+    sprint = forms.ModelChoiceField(
+        Sprint.objects.all(),
+        label='Спринт',
+        help_text='Для тестов, у которых он не указан в файле',
+        required=False
+    )
+    visibility = forms.BooleanField(label='Опубликовать', required=False)
+
+    def clean(self):
+        upload = self.cleaned_data.get('file')
+        if upload and not self.cleaned_data.get('format'):
+            import_format = get_import_format(upload.name)
+            if import_format is None:
+                raise ValidationError('Не удалось определить формат файла')
+            self.cleaned_data['format'] = import_format
+        return self.cleaned_data
@@ -0,0 +1,101 @@
+from django.db import transaction
+from progress.models import Progress, UserAnswer
+
+from .models import Question, QuestionStats
+
+
+class VariantSet:
+    """Variants of one question, loaded once and graded in memory."""
+
+    def __init__(self, question_type: str, variants: list) -> None:
+        self.question_type = question_type
+        self.ids = [variant.id for variant in variants]
+        self.texts = [variant.text for variant in variants]
+        self.normalized = [text.lower() for text in self.texts]
+        self.positions = {
+            variant_id: position for position, variant_id
+            in enumerate(self.ids)
+        }
+        self.correct_mask = self.get_mask(
+            position for position, variant in enumerate(variants)
+            if variant.correct
+        )
+
+    @staticmethod
+    def get_mask(positions: object) -> int:
+        mask = 0
+        for position in positions:
+            mask |= 1 << position
+        return mask
+
+    def get_selected_mask(self, results: list) -> int:
+        if self.question_type == Question.TEXT_ANSWER:
+            answer = results[0].lower()
+            return self.get_mask(
+                position for position, text in enumerate(self.normalized)
+                if text == answer
+            )
+        return self.get_mask(
+            self.positions[variant_id] for variant_id in results
+            if variant_id in self.positions
+        )
+
+    def grade(self, selected_mask: int) -> bool:
+        if self.question_type == Question.MANY_CORRECT:
+            return selected_mask == self.correct_mask
+        return bool(selected_mask & self.correct_mask)
+
+
+def grade_answer(progress: object, question: object,
+                 variant_set: VariantSet, results: list,
+                 no_answers: bool = False) -> object:
+    selected_mask = variant_set.get_selected_mask(results)
+    text_answer = None
+
+    if variant_set.question_type == Question.TEXT_ANSWER:
+        text_answer = results[0]
+
+    return UserAnswer(
+        progress=progress,
+        question_id=question.id,
+        correct=variant_set.grade(selected_mask),
+        no_answers=no_answers,
+        variant_ids=variant_set.ids,
+        selected_mask=selected_mask,
+        correct_mask=variant_set.correct_mask,
+        text_answer=text_answer
+    )
+
+
+def save_answer(progress: object, question: object, variant_set: VariantSet,
+                results: list, no_answers: bool = False) -> object:
+    answer = grade_answer(
+        progress, question, variant_set, results, no_answers
+    )
+
+    with transaction.atomic():
+        answer.save()
+        QuestionStats.objects.register_answer(
+            question.id, progress.exam_revision, answer.correct
+        )
+        Progress.objects.register_answers(progress.id, int(answer.correct))
+    return answer
+
+
+def save_answers(progress: object, submissions: list) -> list:
+    """Grade (question, variant_set, results, no_answers) items in bulk."""
+    answers = [
+        grade_answer(progress, question, variant_set, results, no_answers)
+        for question, variant_set, results, no_answers in submissions
+    ]
+
+    with transaction.atomic():
+        UserAnswer.objects.bulk_create(answers)
+        for answer in answers:
+            QuestionStats.objects.register_answer(
+                answer.question_id, progress.exam_revision, answer.correct
+            )
+        Progress.objects.register_answers(
+            progress.id, sum(answer.correct for answer in answers)
+        )
+    return answers
@@ -0,0 +1,679 @@
+import csv
+import io
+import json
+import re
+from html import unescape
+from pathlib import Path
+from random import randrange
+from xml.etree.ElementTree import ParseError, iterparse
+from zipfile import BadZipFile, ZipFile
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.html import strip_tags
+from slugify import slugify
+
+from .models import Category, Exam, Question, Sprint, Variant
+from .recompute import get_question_active, mark_dirty
+
+IMPORT_FORMATS = ('json', 'ndjson', 'yaml', 'csv', 'gift', 'xml', 'zip')
+
+IMPORT_EXTENSIONS = {
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.csv': 'csv',
+    '.gift': 'gift',
+    '.txt': 'gift',
+    '.xml': 'xml',
+    '.zip': 'zip'
+}
+
+EXAM_BOOLEAN_FIELDS = (
+    'allow_retesting', 'show_results', 'only_guest_keys', 'show_correct',
+    'shuffle_variants', 'empty_answers', 'single_page'
+)
+
+EXAM_RANGES = {
+    'timer': (1, 720),
+    'required_percent': (1, 100),
+    'priority': (1, 99)
+}
+
+CSV_COLUMNS = ('exam', 'category', 'sprint', 'question', 'type', 'variant',
+               'correct')
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y', '+', 'да')
+
+GIFT_ESCAPES = re.compile(r'\\([~=#{}:\\])')
+GIFT_TOKEN = re.compile(r'(?<!\\)[=~]')
+GIFT_WEIGHT = re.compile(r'^%(-?\d+(?:\.\d+)?)%')
+
+
+class ExamImportError(ValueError):
+    pass
+
+
+def get_import_format(filename: str) -> str or None:
+    return IMPORT_EXTENSIONS.get(Path(filename).suffix.lower())
+
+
+def to_bool(value: object) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def to_text(value: object) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def html_to_text(value: str or None) -> str:
+    return unescape(strip_tags(value or '')).strip()
+
+
+def iter_exam_list(data: object) -> object:
+    if isinstance(data, dict):
+        data = data['exams'] if 'exams' in data else [data]
+    if not isinstance(data, list):
+        raise ExamImportError('Ожидается список тестов')
+    yield from data
+
+
+def parse_json(stream: object, title: str) -> object:
+    try:
+        data = json.load(stream)
+    except ValueError as error:
+        raise ExamImportError(f'Неверный JSON: {error}')
+    yield from iter_exam_list(data)
+
+
+def parse_ndjson(stream: object, title: str) -> object:
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise ExamImportError(f'Строка {number}: неверный JSON: {error}')
+
+
+def parse_yaml(stream: object, title: str) -> object:
+    try:
+        import yaml
+    except ImportError:
+        raise ExamImportError('Для импорта YAML требуется пакет PyYAML')
+    try:
+        data = yaml.safe_load(stream)
+    except yaml.YAMLError as error:
+        raise ExamImportError(f'Неверный YAML: {error}')
+    yield from iter_exam_list(data)
+
+
+def parse_csv(stream: object, title: str) -> object:
+    """One row per variant, rows of one exam and question go in a row."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise ExamImportError(
+            'В CSV нет колонок: ' + ', '.join(sorted(missing))
+        )
+    exam = question = None
+
+    for row in reader:
+        exam_title = to_text(row['exam']) or title
+        if exam is None or exam['title'] != exam_title:
+            if exam is not None:
+                yield exam
+            exam = {
+                'title': exam_title,
+                'category': to_text(row['category']) or None,
+                'sprint': to_text(row['sprint']) or None,
+                'questions': []
+            }
+            question = None
+
+        text = to_text(row['question'])
+        if question is None or question['text'] != text:
+            question = {
+                'text': text,
+                'type': to_text(row['type']) or Question.ONE_CORRECT,
+                'variants': []
+            }
+            exam['questions'].append(question)
+
+        if to_text(row['variant']):
+            question['variants'].append({
+                'text': to_text(row['variant']),
+                'correct': to_bool(row['correct'])
+            })
+
+    if exam is not None:
+        yield exam
+
+
+def unescape_gift(value: str) -> str:
+    return GIFT_ESCAPES.sub(r'\1', value).strip()
+
+
+def find_gift_brace(value: str, brace: str, start: int = 0) -> int:
+    position = value.find(brace, start)
+    while position > 0 and value[position - 1] == '\\':
+        position = value.find(brace, position + 1)
+    return position
+
+
+def parse_gift_answers(answers: str) -> tuple:
+    if answers.upper() in ('T', 'TRUE', 'F', 'FALSE'):
+        correct = answers.upper().startswith('T')
+        return Question.ONE_CORRECT, [
+            {'text': 'Верно', 'correct': correct},
+            {'text': 'Неверно', 'correct': not correct}
+        ]
+
+    starts = [match.start() for match in GIFT_TOKEN.finditer(answers)]
+    if not starts or answers[:starts[0]].strip():
+        return None, []
+
+    variants = []
+    weighted = False
+    wrong = False
+
+    for start, end in zip(starts, starts[1:] + [len(answers)]):
+        token = answers[start + 1:end]
+        feedback = find_gift_brace(token, '#')
+        if feedback >= 0:
+            token = token[:feedback]
+        if '->' in token:
+            return None, []
+
+        weight = GIFT_WEIGHT.match(token)
+        if weight:
+            weighted = True
+            token = token[weight.end():]
+            correct = float(weight.group(1)) > 0
+        else:
+            correct = answers[start] == '='
+        wrong = wrong or answers[start] == '~'
+        variants.append({'text': unescape_gift(token), 'correct': correct})
+
+    if not wrong:
+        return Question.TEXT_ANSWER, variants
+    if weighted or sum(variant['correct'] for variant in variants) > 1:
+        return Question.MANY_CORRECT, variants
+    return Question.ONE_CORRECT, variants
+
+
+def parse_gift_question(block: str) -> dict:
+    block = block.strip()
+    if block.startswith('::'):
+        end = block.find('::', 2)
+        block = block[end + 2:].lstrip() if end > 0 else block
+    if block.startswith('['):
+        block = block[block.find(']') + 1:].lstrip()
+
+    opening = find_gift_brace(block, '{')
+    closing = find_gift_brace(block, '}', opening + 1)
+    if opening < 0 or closing < 0:
+        return {'text': unescape_gift(block), 'type': None, 'variants': []}
+
+    question_type, variants = parse_gift_answers(
+        block[opening + 1:closing].strip()
+    )
+    text = unescape_gift(block[:opening])
+    tail = unescape_gift(block[closing + 1:])
+    if tail:
+        text = f'{text} _____ {tail}'
+    return {
+        'text': html_to_text(text),
+        'type': question_type,
+        'variants': variants
+    }
+
+
+def parse_gift(stream: object, title: str) -> object:
+    """Moodle GIFT: $CATEGORY starts a new exam, blank lines split items."""
+    exam = {'title': title, 'questions': []}
+    lines = []
+
+    for line in io.TextIOWrapper(stream, encoding='utf-8-sig'):
+        stripped = line.strip()
+
+        if stripped.startswith('//'):
+            continue
+        if stripped.startswith('$CATEGORY:'):
+            if exam['questions']:
+                yield exam
+            category = stripped[len('$CATEGORY:'):].strip()
+            exam = {'title': category.split('/')[-1], 'questions': []}
+            continue
+        if stripped:
+            lines.append(line)
+            continue
+        if lines:
+            exam['questions'].append(parse_gift_question(''.join(lines)))
+            lines = []
+
+    if lines:
+        exam['questions'].append(parse_gift_question(''.join(lines)))
+    if exam['questions']:
+        yield exam
+
+
+def get_xml_text(element: object, path: str) -> str:
+    return html_to_text(element.findtext(path))
+
+
+def get_xml_fraction(answer: object) -> float:
+    try:
+        return float(answer.get('fraction') or 0)
+    except ValueError:
+        raise ExamImportError(
+            f'Неверная доля балла ответа: {answer.get("fraction")}'
+        )
+
+
+def parse_xml_question(element: object) -> dict:
+    xml_type = element.get('type')
+    answers = [
+        {
+            'text': get_xml_text(answer, 'text'),
+            'correct': get_xml_fraction(answer) > 0
+        }
+        for answer in element.findall('answer')
+    ]
+    question_type = None
+
+    if xml_type == 'multichoice':
+        single = (element.findtext('single') or 'true').strip() == 'true'
+        question_type = (
+            Question.ONE_CORRECT if single else Question.MANY_CORRECT
+        )
+    elif xml_type == 'truefalse':
+        question_type = Question.ONE_CORRECT
+    elif xml_type == 'shortanswer':
+        question_type = Question.TEXT_ANSWER
+
+    return {
+        'text': get_xml_text(element, 'questiontext/text'),
+        'type': question_type,
+        'success_message': get_xml_text(element, 'generalfeedback/text'),
+        'variants': answers if question_type else []
+    }
+
+
+def parse_xml(stream: object, title: str) -> object:
+    """Moodle XML: category questions start a new exam."""
+    exam = {'title': title, 'questions': []}
+
+    try:
+        for _, element in iterparse(stream):
+            if element.tag != 'question':
+                continue
+            if element.get('type') == 'category':
+                if exam['questions']:
+                    yield exam
+                category = (element.findtext('category/text') or '').strip()
+                exam = {
+                    'title': category.split('/')[-1] or title,
+                    'questions': []
+                }
+            else:
+                exam['questions'].append(parse_xml_question(element))
+            element.clear()
+    except ParseError as error:
+        raise ExamImportError(f'Неверный XML: {error}')
+
+    if exam['questions']:
+        yield exam
+
+
+def parse_zip(stream: object, title: str) -> object:
+    """Archive written by export_exams."""
+    try:
+        with ZipFile(stream) as archive, archive.open(
+            'exams.ndjson'
+        ) as member:
+            yield from parse_ndjson(member, title)
+    except (BadZipFile, KeyError) as error:
+        raise ExamImportError(f'Неверный архив: {error}')
+
+
+PARSERS = {
+    'json': parse_json,
+    'ndjson': parse_ndjson,
+    'yaml': parse_yaml,
+    'csv': parse_csv,
+    'gift': parse_gift,
+    'xml': parse_xml,
+    'zip': parse_zip
+}
+
+
+def get_slugs(model: object, titles: list) -> list:
+    """Slugs in the format of the models' save(), unique in one query."""
+    slugs = [None] * len(titles)
+    pending = list(range(len(titles)))
+
+    while pending:
+        for index in pending:
+            slugs[index] = (
+                slugify(titles[index]) + '-' + str(randrange(10000, 99999))
+            )
+        taken = set(
+            model.objects
+            .filter(slug__in=[slugs[index] for index in pending])
+            .values_list('slug', flat=True)
+        )
+        seen = set()
+        retry = []
+        for index in pending:
+            if slugs[index] in taken or slugs[index] in seen:
+                retry.append(index)
+            seen.add(slugs[index])
+        pending = retry
+    return slugs
+
+
+def set_created_ids(objects: list, queryset: object) -> None:
+    """Backends without RETURNING leave bulk-created pks empty."""
+    if not objects or objects[0].pk is not None:
+        return
+    for obj, pk in zip(objects, queryset.order_by('id').values_list(
+        'id', flat=True
+    )):
+        obj.pk = pk
+
+
+class ExamImporter:
+    """Validates exam records and writes them with bulk_create in batches."""
+
+    def __init__(self, batch_size: int = 1000, category: object = None,
+                 sprint: object = None, visibility: bool = False,
+                 author: object = None) -> None:
+        self.batch_size = batch_size
+        self.category = category
+        self.sprint = sprint
+        self.visibility = visibility
+        self.author = author
+        self.categories = {}
+        self.sprints = {}
+        self.records = []
+        self.questions_count = 0
+        self.stats = {'exams': 0, 'questions': 0, 'variants': 0,
+                      'skipped': 0}
+
+    def run(self, records: object) -> dict:
+        for position, record in enumerate(records, 1):
+            self.add(self.clean_exam(record, position))
+        self.flush()
+        return self.stats
+
+    def add(self, record: dict) -> None:
+        self.records.append(record)
+        self.questions_count += len(record['questions'])
+
+        if self.questions_count >= self.batch_size:
+            self.flush()
+
+    def clean_exam(self, record: object, position: int) -> dict:
+        if not isinstance(record, dict):
+            raise ExamImportError(f'Тест #{position}: ожидается объект')
+
+        title = to_text(record.get('title'))
+        if not title or len(title) > 200:
+            raise ExamImportError(
+                f'Тест #{position}: название пустое или длиннее 200 символов'
+            )
+
+        exam = {
+            'title': title,
+            'description': to_text(record.get('description')) or title,
+            'success_message': to_text(record.get('success_message')) or None,
+            'category': self.clean_related_title(
+                record.get('category'), f'Тест "{title}": категория'
+            ),
+            'sprint': self.clean_related_title(
+                record.get('sprint'), f'Тест "{title}": спринт'
+            ),
+            'visibility': self.visibility,
+            'revision': self.clean_revision(record.get('revision'), title)
+        }
+        for field in EXAM_BOOLEAN_FIELDS:
+            if record.get(field) is not None:
+                exam[field] = to_bool(record[field])
+        for field, (low, high) in EXAM_RANGES.items():
+            exam[field] = self.clean_number(
+                record.get(field), low, high, f'Тест "{title}": {field}'
+            )
+
+        if not isinstance(record.get('questions') or [], list):
+            raise ExamImportError(f'Тест "{title}": ожидается список вопросов')
+
+        questions = []
+        for question in record.get('questions') or ():
+            question = self.clean_question(question, title)
+            if question is None:
+                self.stats['skipped'] += 1
+            else:
+                questions.append(question)
+        exam['questions'] = questions
+        return exam
+
+    def clean_question(self, record: object, title: str) -> dict or None:
+        if not isinstance(record, dict):
+            raise ExamImportError(f'Тест "{title}": ожидается вопрос')
+
+        text = to_text(record.get('text'))
+        question_type = record.get('type')
+        if question_type is None or not text:
+            return None
+        if (
+            not isinstance(question_type, str)
+            or question_type not in dict(Question.TYPES)
+        ):
+            raise ExamImportError(
+                f'Тест "{title}": неизвестный тип вопроса {question_type}'
+            )
+
+        records = record.get('variants') or []
+        if not isinstance(records, list) or not all(
+            isinstance(variant, dict) for variant in records
+        ):
+            raise ExamImportError(
+                f'Вопрос "{text}": ожидается список вариантов ответа'
+            )
+
+        variants = [
+            {
+                'text': to_text(variant.get('text')),
+                'correct': to_bool(variant.get('correct')),
+                'priority': self.clean_number(
+                    variant.get('priority'), 1, 99, f'Вопрос "{text}"'
+                )
+            }
+            for variant in records
+            if to_text(variant.get('text'))
+        ]
+        if len(variants) > Variant.MAX_PER_QUESTION:
+            raise ExamImportError(
+                f'Вопрос "{text}": больше {Variant.MAX_PER_QUESTION} '
+                'вариантов ответа'
+            )
+
+        return {
+            'text': text,
+            'type': question_type,
+            'description': to_text(record.get('description')) or None,
+            'success_message': to_text(record.get('success_message')) or None,
+            'priority': self.clean_number(
+                record.get('priority'), 1, 99, f'Вопрос "{text}"'
+            ),
+            'visibility': to_bool(record.get('visibility', True)),
+            'variants': variants
+        }
+
+    @staticmethod
+    def clean_number(value: object, low: int, high: int,
+                     label: str) -> int or None:
+        if value in (None, ''):
+            return None
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ExamImportError(f'{label}: ожидается число')
+        if not low <= number <= high:
+            raise ExamImportError(f'{label}: допустимо от {low} до {high}')
+        return number
+
+    @staticmethod
+    def clean_related_title(value: object, label: str) -> str or None:
+        title = to_text(value)
+        if len(title) > 200:
+            raise ExamImportError(f'{label}: название длиннее 200 символов')
+        return title or None
+
+    @staticmethod
+    def clean_revision(value: object, title: str) -> object:
+        if value in (None, ''):
+            return None
+        revision = parse_datetime(str(value))
+        if revision is None:
+            raise ExamImportError(f'Тест "{title}": неверная редакция')
+        if timezone.is_naive(revision):
+            revision = timezone.make_aware(revision)
+        return revision
+
+    def get_related_ids(self, model: object, cache: dict,
+                        titles: set) -> dict:
+        missing = {title for title in titles if title not in cache}
+        if missing:
+            for title, pk in (
+                model.objects
+                .filter(title__in=missing)
+                .order_by('id')
+                .values_list('title', 'id')
+            ):
+                cache.setdefault(title, pk)
+
+            missing = sorted(title for title in missing if title not in cache)
+            created = [
+                model(title=title, slug=slug)
+                for title, slug in zip(missing, get_slugs(model, missing))
+            ]
+            model.objects.bulk_create(created)
+            cache.update(
+                model.objects
+                .filter(slug__in=[obj.slug for obj in created])
+                .values_list('title', 'id')
+            )
+        return cache
+
+    def flush(self) -> None:
+        if not self.records:
+            return
+
+        categories = self.get_related_ids(Category, self.categories, {
+            record['category'] for record in self.records
+            if record['category']
+        })
+        sprints = self.get_related_ids(Sprint, self.sprints, {
+            record['sprint'] for record in self.records if record['sprint']
+        })
+        slugs = get_slugs(
+            Exam, [record['title'] for record in self.records]
+        )
+        now = timezone.now()
+        exams = []
+        questions = []
+
+        for record, slug in zip(self.records, slugs):
+            exam = Exam(
+                slug=slug,
+                author=self.author,
+                category_id=categories.get(
+                    record['category'],
+                    getattr(self.category, 'id', None)
+                ),
+                sprint_id=sprints.get(
+                    record['sprint'], getattr(self.sprint, 'id', None)
+                ),
+                **{
+                    field: value for field, value in record.items()
+                    if field not in ('category', 'sprint', 'questions')
+                }
+            )
+            exam_questions = [
+                (Question(
+                    text=question['text'],
+                    type=question['type'],
+                    description=question['description'],
+                    success_message=question['success_message'],
+                    priority=question['priority'],
+                    visibility=question['visibility'],
+                    active=get_question_active(
+                        question['type'], exam.empty_answers,
+                        len(question['variants']),
+                        sum(v['correct'] for v in question['variants'])
+                    )
+                ), question['variants'])
+                for question in record['questions']
+            ]
+            exam.questions_count = sum(
+                question.active and question.visibility
+                for question, _ in exam_questions
+            )
+            exam.active = exam.questions_count > 0
+            if not exam.active or not exam.visibility:
+                exam.revision = None
+            elif exam.revision is None:
+                exam.revision = now
+            exams.append(exam)
+            questions.append(exam_questions)
+
+        Exam.objects.bulk_create(exams)
+        exam_ids = dict(
+            Exam.objects.filter(slug__in=slugs).values_list('slug', 'id')
+        )
+        for_create = []
+        for exam, exam_questions in zip(exams, questions):
+            exam.id = exam_ids[exam.slug]
+            for question, _ in exam_questions:
+                question.exam_id = exam.id
+                for_create.append(question)
+
+        Question.objects.bulk_create(for_create, batch_size=self.batch_size)
+        set_created_ids(
+            for_create, Question.objects.filter(exam_id__in=exam_ids.values())
+        )
+        variants = [
+            Variant(question_id=question.id, **variant)
+            for exam_questions in questions
+            for question, question_variants in exam_questions
+            for variant in question_variants
+        ]
+        Variant.objects.bulk_create(variants, batch_size=self.batch_size)
+
+        mark_dirty(
+            categories=[exam.category_id for exam in exams],
+            sprints=[exam.sprint_id for exam in exams],
+            positions=[exam.sprint_id for exam in exams]
+        )
+        self.stats['exams'] += len(exams)
+        self.stats['questions'] += len(for_create)
+        self.stats['variants'] += len(variants)
+        self.records = []
+        self.questions_count = 0
+
+
+def import_exams(stream: object, import_format: str, title: str,
+                 **options) -> dict:
+    records = PARSERS[import_format](stream, title)
+    try:
+        return ExamImporter(**options).run(records)
+    except UnicodeDecodeError:
+        raise ExamImportError('Файл должен быть в кодировке UTF-8')
+    except csv.Error as error:
+        raise ExamImportError(f'Неверный CSV: {error}')
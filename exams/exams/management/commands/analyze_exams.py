@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from exams.analysis import analyze_exam
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = ('Рассчитывает сложность, дискриминативность вопросов, выбор '
+            'вариантов ответа и альфу Кронбаха для текущих редакций тестов')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--exam',
+            type=int,
+            action='append',
+            help='id теста, по умолчанию все опубликованные тесты'
+        )
+
+    def handle(self, **options):
+        exams = Exam.objects.filter(active=True, visibility=True)
+
+        if options['exam']:
+            exams = Exam.objects.filter(id__in=options['exam'])
+
+        for exam in exams.only('id', 'title', 'revision'):
+            analysis = analyze_exam(exam)
+            self.stdout.write(
+                f'{exam.title}: попыток {analysis.attempts}, '
+                f'альфа {analysis.alpha}'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Анализ тестов пересчитан'))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from exams.exports import EXPORT_FORMATS, get_export_queryset, iter_export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает тесты с настройками, вопросами и вариантами ответов '
+            'в NDJSON или zip-архив для переноса командой import_exams')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--exam',
+            type=int,
+            action='append',
+            help='id теста, по умолчанию все тесты'
+        )
+        parser.add_argument('--category', type=int, help='id категории')
+        parser.add_argument('--sprint', type=int, help='id спринта')
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default=EXPORT_FORMATS[0]
+        )
+        parser.add_argument(
+            '--output', help='Файл для записи, по умолчанию stdout'
+        )
+        parser.add_argument('--chunk-size', type=int, default=200)
+
+    def handle(self, **options):
+        chunks = iter_export(
+            get_export_queryset(
+                options['exam'], options['category'], options['sprint']
+            ),
+            options['format'],
+            options['chunk_size']
+        )
+
+        if options['format'] == 'zip':
+            if options['output']:
+                with open(options['output'], 'wb') as f:
+                    f.writelines(chunks)
+            else:
+                for chunk in chunks:
+                    self.stdout.buffer.write(chunk)
+            return
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            f.writelines(chunks)
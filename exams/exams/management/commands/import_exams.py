@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from exams.imports import (IMPORT_FORMATS, ExamImportError, get_import_format,
+                           import_exams)
+from exams.models import Category, Sprint
+
+
+class Command(BaseCommand):
+    help = ('Импортирует тесты с вопросами и вариантами ответов из JSON, '
+            'NDJSON, YAML, CSV, Moodle GIFT или Moodle XML')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help='По умолчанию определяется по расширению файла'
+        )
+        parser.add_argument(
+            '--category',
+            type=int,
+            help='id категории для тестов, у которых она не указана'
+        )
+        parser.add_argument(
+            '--sprint',
+            type=int,
+            help='id спринта для тестов, у которых он не указан'
+        )
+        parser.add_argument(
+            '--visibility',
+            action='store_true',
+            help='Сразу опубликовать импортированные тесты'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, **options):
+        path = Path(options['path'])
+        import_format = options['format'] or get_import_format(path.name)
+        if import_format is None:
+            raise CommandError('Не удалось определить формат файла')
+
+        category = sprint = None
+        if options['category']:
+            category = Category.objects.filter(id=options['category']).first()
+        if options['sprint']:
+            sprint = Sprint.objects.filter(id=options['sprint']).first()
+
+        try:
+            with path.open('rb') as stream, transaction.atomic():
+                stats = import_exams(
+                    stream, import_format, path.stem,
+                    batch_size=options['batch_size'],
+                    category=category,
+                    sprint=sprint,
+                    visibility=options['visibility']
+                )
+        except (OSError, ExamImportError) as error:
+            raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано тестов: {stats["exams"]}, '
+            f'вопросов: {stats["questions"]}, '
+            f'вариантов ответа: {stats["variants"]}, '
+            f'пропущено вопросов: {stats["skipped"]}'
+        ))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from progress.models import UserAnswer
+
+from exams.models import QuestionStats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику ответов на вопросы по редакциям тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, **options):
+        batch_size = options['batch_size']
+        answers = (
+            UserAnswer.objects
+            .filter(question__isnull=False)
+            .values('question_id', 'progress__exam_revision')
+            .annotate(
+                attempts=Count('id'),
+                correct_count=Count('id', filter=Q(correct=True))
+            )
+            .order_by()
+            .iterator(chunk_size=batch_size)
+        )
+
+        with transaction.atomic():
+            QuestionStats.objects.all().delete()
+            for_create = []
+
+            for row in answers:
+                for_create.append(QuestionStats(
+                    question_id=row['question_id'],
+                    exam_revision=row['progress__exam_revision'],
+                    attempts=row['attempts'],
+                    correct_count=row['correct_count'],
+                    correct_percentage=(
+                        row['correct_count'] * 100 // row['attempts']
+                    )
+                ))
+                if len(for_create) >= batch_size:
+                    QuestionStats.objects.bulk_create(for_create)
+                    for_create = []
+
+            QuestionStats.objects.bulk_create(for_create)
+
+        self.stdout.write(
+            self.style.SUCCESS('Статистика вопросов пересчитана')
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from exams.models import Category, Exam, Sprint
+from exams.utils import (get_category_counters, get_exam_counters,
+                         get_sprint_counters, update_category_counters,
+                         update_exam_counters, update_sprint_counters)
+
+
+class Command(BaseCommand):
+    help = ('Проверяет сохраненные счетчики тестов, категорий и спринтов '
+            'и при необходимости исправляет их')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Пересчитать счетчики, не совпадающие с фактическими'
+        )
+
+    def handle(self, **options):
+        checks = (
+            (Exam, get_exam_counters, update_exam_counters),
+            (Category, get_category_counters, update_category_counters),
+            (Sprint, get_sprint_counters, update_sprint_counters),
+        )
+
+        with transaction.atomic():
+            for model, get_counters, update_counters in checks:
+                mismatched = self.get_mismatched(model, get_counters())
+                name = model._meta.verbose_name_plural
+                self.stdout.write(f'{name}: расхождений {len(mismatched)}')
+
+                if mismatched and options['fix']:
+                    update_counters(mismatched)
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{name}: счетчики исправлены'
+                    ))
+
+    def get_mismatched(self, model, counters):
+        expected = {
+            f'expected_{field}': value for field, value in counters.items()
+        }
+        actual = {
+            field: F(f'expected_{field}') for field in counters
+        }
+        mismatched = (
+            model.objects
+            .annotate(**expected)
+            .exclude(**actual)
+            .values_list('id', flat=True)
+        )
+        return list(mismatched)
@@ -1,9 +1,7 @@
-from itertools import chain
-from operator import attrgetter
-
-from django.db.models import (Case, Count, DateTimeField, ExpressionWrapper, F,
-                              IntegerField, Manager, Q, QuerySet, When)
-from django.db.models.functions.comparison import NullIf
+from django.db import IntegrityError, transaction
+from django.db.models import (Case, ExpressionWrapper, F, FilteredRelation,
+                              IntegerField, Manager, Q, QuerySet, Sum, When)
+from django.db.models.functions.comparison import Coalesce, Least, NullIf
 
 
 class CategoryManager(Manager):
@@ -11,12 +9,7 @@ class CategoryManager(Manager):
     def exams_count(self) -> object:
         count = (
             self
-            .only('title', 'slug', 'show_empty', 'description')
-            .annotate(
-                exams_count=Count('exams', distinct=True, filter=Q(
-                    exams__active=True, exams__visibility=True
-                ))
-            )
+            .only('title', 'slug', 'show_empty', 'description', 'exams_count')
             .order_by('priority', '-exams_count', 'title')
         )
         return count
@@ -25,61 +18,29 @@ class CategoryManager(Manager):
 class SprintQuerySet(QuerySet):
 
     def with_stats(self, user: object = None) -> object:
+        stats = self.order_by('-created')
 
-        stats = (
-            self
-            .annotate(
-                exams_count=Count('exams', distinct=True, filter=Q(
-                    exams__active=True, exams__visibility=True
-                )),
-                questions_count=Count(
-                    'exams__questions', distinct=True, filter=Q(
-                        exams__questions__active=True,
-                        exams__questions__visibility=True
-                    )
-                ),
-            )
-            .order_by('-created')
-        )
-
-        if user.is_authenticated:
-            user_progress = (
-                self
-                .filter(progress__user=user)
-                .order_by('progress__id', '-progress__started')
-                .distinct('progress__id')
-                .values('progress__id')
-            )
-
-            user_started = Case(
-                When(progress__user=user, then=F('progress__started')),
-                default=None, output_field=DateTimeField())
-
-            user_finished = Case(
-                When(progress__user=user, then=F('progress__finished')),
-                default=None, output_field=DateTimeField())
-
-            user_annotates = {
-                'user_started': user_started,
-                'user_finished': user_finished
-            }
-
-            only_with_progress = (
+        if user is not None and user.is_authenticated:
+            stats = (
                 stats
-                .filter(progress__id__in=user_progress)
-                .annotate(**user_annotates)
+                .annotate(
+                    user_sprint=FilteredRelation(
+                        'progress', condition=Q(progress__user=user)
+                    )
+                )
+                .annotate(
+                    user_started=F('user_sprint__started'),
+                    user_finished=F('user_sprint__finished'),
+                    user_percentage=Least(
+                        F('user_sprint__passed_count') * 100
+                        / NullIf(F('exams_count'), 0),
+                        100
+                    )
+                )
             )
-            without_user = stats.exclude(progress__id__in=user_progress)
 
             if user.hide_finished_sprints:
-                only_with_progress = only_with_progress.exclude(
-                    user_finished__isnull=False
-                )
-
-            stats = sorted(
-                list(chain(only_with_progress, without_user)),
-                key=attrgetter('created'), reverse=True
-            )
+                stats = stats.filter(user_finished__isnull=True)
 
         return stats
 
@@ -89,67 +50,35 @@ class SprintManager(Manager):
     def get_queryset(self):
         return SprintQuerySet(self.model, using=self._db)
 
-    def with_stats(self):
-        return self.get_queryset().with_stats()
+    def with_stats(self, user: object = None):
+        return self.get_queryset().with_stats(user)
 
 
 class ExamQuerySet(QuerySet):
 
-    def questions_count(self):
-        count = (
-            self
-            .annotate(
-                questions_count=Count('questions', distinct=True, filter=Q(
-                    questions__visibility=True,
-                    questions__active=True
-                ))
-            )
-        )
-        return count
-
-    def users_stats(self):
-        stats = (
+    def with_user_latest_progress(self, user: object) -> object:
+        progress = (
             self
             .annotate(
-                users_count=Count('progress__user', distinct=True, filter=Q(
-                    progress__finished__isnull=False
-                )),
-                average_progress=ExpressionWrapper(NullIf(Count(
-                    'progress__answers', distinct=True, filter=Q(
-                        progress__finished__isnull=False,
-                        progress__answers__correct=True
-                    )), 0) * 100 / NullIf(Count(
-                        'progress__answers', distinct=True, filter=Q(
-                            progress__finished__isnull=False
-                        )), 0),
-                    output_field=IntegerField()
+                user_state=FilteredRelation(
+                    'user_states', condition=Q(user_states__user=user)
                 )
             )
-        )
-        return stats
-
-    def with_request_user_progress(self):
-        progress = (
-            self
             .annotate(
-                current_answers=F('progress__answers_quantity'),
-                current_stage=F('progress__stage'),
-                progress_id=F('progress__id'),
-                started=F('progress__started'),
-                finished=F('progress__finished'),
-                passed=F('progress__passed'),
+                progress_id=F('user_state__progress_id'),
+                current_answers=F('user_state__answers_quantity'),
+                current_stage=F('user_state__stage'),
+                started=F('user_state__started'),
+                finished=F('user_state__finished'),
+                passed=F('user_state__passed'),
                 percentage_answers=ExpressionWrapper(
-                    F('progress__answers_quantity') * 100 / NullIf(Count(
-                        'questions', distinct=True, filter=Q(
-                            questions__active=True,
-                            questions__visibility=True
-                        )), 0),
+                    F('user_state__answers_quantity') * 100
+                    / NullIf(F('questions_count'), 0),
                     output_field=IntegerField()
                 ),
                 percentage_correct=ExpressionWrapper(
-                    NullIf(Count('progress__answers', distinct=True, filter=Q(
-                        progress__answers__correct=True)), 0) * 100
-                    / F('progress__answers_quantity'),
+                    NullIf(F('user_state__correct_count'), 0) * 100
+                    / NullIf(F('user_state__answers_quantity'), 0),
                     output_field=IntegerField()
                 )
             )
@@ -158,69 +87,39 @@ class ExamQuerySet(QuerySet):
 
     def list_(self, user: object = None, only_user: bool = False,
               in_sprint: bool = False) -> object:
-        filter_data = {
-            'visibility': True,
-            'active': True
-        }
-        fields_only = ['title', 'slug', 'created',
-                       'priority', 'category__title', 'sprint__title']
+        fields_only = ['title', 'slug', 'created', 'priority',
+                       'questions_count', 'users_count', 'average_progress',
+                       'category__title', 'sprint__title']
 
-        order_data = ['-created']
+        order_data = ['-created', '-id']
 
         if in_sprint:
-            order_data = ['priority']
-
-        try:
-            user_progress = (
-                self
-                .filter(progress__user=user)
-                .order_by('progress__exam__id', '-progress__started')
-                .distinct('progress__exam__id')
-                .values('progress__id')
-            )
-            filter_data['progress__id__in'] = user_progress
-            exams = self.filter(**filter_data).with_request_user_progress()
-
-            if only_user is False:
-                exams = exams.only(*fields_only).questions_count()
-                query_without_user = (
-                    self
-                    .users_stats()
-                    .filter(~Q(id__in=exams))
-                    .only(*fields_only)
-                    .questions_count()
-                )
-
-                if in_sprint:
-                    exams = list(chain(
-                        query_without_user.order_by('priority', '-created'),
-                        exams.order_by('priority', '-created')
-                    ))
-                else:
-                    if user.hide_finished_exams:
-                        exams = exams.exclude(finished__isnull=False)
-
-                    exams = sorted(
-                        list(chain(query_without_user, exams)),
-                        key=attrgetter('created'), reverse=True
-                    )
-
-                return exams
-            else:
-                return exams.only(*fields_only).questions_count()
-
-        except TypeError:
-            pass
+            order_data = ['priority', '-created', '-id']
 
         exams = (
             self
-            .users_stats()
-            .filter(**filter_data)
+            .filter(visibility=True, active=True)
             .only(*fields_only)
-            .questions_count()
-            .order_by(*order_data)
         )
-        return exams
+
+        if user is None or not user.is_authenticated:
+            return exams.order_by(*order_data)
+
+        exams = exams.with_user_latest_progress(user)
+
+        if only_user:
+            return exams.filter(progress_id__isnull=False)
+
+        if in_sprint:
+            started_last = Case(
+                When(progress_id__isnull=True, then=0),
+                default=1, output_field=IntegerField())
+            return exams.order_by(started_last, *order_data)
+
+        if user.hide_finished_exams:
+            exams = exams.filter(finished__isnull=True)
+
+        return exams.order_by(*order_data)
 
 
 class ExamManager(Manager):
@@ -228,14 +127,66 @@ class ExamManager(Manager):
     def get_queryset(self):
         return ExamQuerySet(self.model, using=self._db)
 
-    def questions_count(self):
-        return self.get_queryset().questions_count()
+    def with_user_latest_progress(self, user: object) -> object:
+        return self.get_queryset().with_user_latest_progress(user)
+
+    def list_(self, user: object = None, only_user: bool = False,
+              in_sprint: bool = False) -> object:
+        return self.get_queryset().list_(user, only_user, in_sprint)
+
+
+class QuestionStatsManager(Manager):
+
+    def register_answer(self, question_id: int, exam_revision: object,
+                        correct: bool) -> None:
+        correct = int(bool(correct))
+        stats = self.filter(
+            question_id=question_id, exam_revision=exam_revision
+        )
+        increment = {
+            'attempts': F('attempts') + 1,
+            'correct_count': F('correct_count') + correct,
+            'correct_percentage': (
+                (F('correct_count') + correct) * 100 / (F('attempts') + 1)
+            )
+        }
 
-    def users_stats(self):
-        return self.get_queryset().users_stats()
+        if stats.update(**increment):
+            return
 
-    def with_request_user_progress(self):
-        return self.get_queryset().with_request_user_progress()
+        try:
+            with transaction.atomic():
+                self.create(
+                    question_id=question_id,
+                    exam_revision=exam_revision,
+                    attempts=1,
+                    correct_count=correct,
+                    correct_percentage=correct * 100
+                )
+        except IntegrityError:
+            stats.update(**increment)
+
+    def unregister_answer(self, question_id: int, exam_revision: object,
+                          correct: bool) -> None:
+        correct = int(bool(correct))
+        self.filter(
+            question_id=question_id, exam_revision=exam_revision,
+            attempts__gt=0
+        ).update(
+            attempts=F('attempts') - 1,
+            correct_count=F('correct_count') - correct,
+            correct_percentage=Coalesce(
+                (F('correct_count') - correct) * 100
+                / NullIf(F('attempts') - 1, 0), 0
+            )
+        )
 
-    def list_(self, user: object = None, only_user: bool = False) -> object:
-        return self.get_queryset().list_(user, only_user)
+    def global_percentage(self, question_id: int) -> int or None:
+        totals = (
+            self
+            .filter(question_id=question_id)
+            .aggregate(attempts=Sum('attempts'), correct=Sum('correct_count'))
+        )
+        if not totals['attempts']:
+            return None
+        return totals['correct'] * 100 // totals['attempts']
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='exams_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Тестов'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='answers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ответов в завершенных попытках'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='average_progress',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Процент верных ответов пользователей'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='correct_answers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Верных ответов в завершенных попытках'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='questions_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Вопросов'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='users_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Пользователей завершивших тест'),
+        ),
+        migrations.AddField(
+            model_name='sprint',
+            name='exams_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Тестов'),
+        ),
+        migrations.AddField(
+            model_name='sprint',
+            name='questions_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Вопросов'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_revision', models.DateTimeField(blank=True, null=True, verbose_name='Редакция тестирования')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Ответов')),
+                ('correct_count', models.PositiveIntegerField(default=0, verbose_name='Верных ответов')),
+                ('correct_percentage', models.PositiveIntegerField(default=0, verbose_name='Процент верных ответов')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='exams.question', verbose_name='Вопрос')),
+            ],
+            options={
+                'verbose_name': 'Статистика вопроса',
+                'verbose_name_plural': 'Статистика вопросов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='questionstats',
+            constraint=models.UniqueConstraint(fields=('question', 'exam_revision'), name='unique_question_revision_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('exam_revision__isnull', True)), fields=('question',), name='unique_question_without_revision_stats'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_questionstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='single_page',
+            field=models.BooleanField(default=False, help_text='Тест отправляется одной формой и проверяется целиком после ответа на все вопросы', verbose_name='Все вопросы на одной странице'),
+        ),
+    ]
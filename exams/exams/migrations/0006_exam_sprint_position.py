@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+def fill_sprint_positions(apps, schema_editor):
+    Exam = apps.get_model('exams', 'Exam')
+    exams = list(
+        Exam.objects
+        .filter(sprint__isnull=False)
+        .order_by('sprint_id', 'priority', '-created', '-id')
+        .only('id', 'sprint_id')
+    )
+    positions = {}
+
+    for exam in exams:
+        exam.sprint_position = positions.get(exam.sprint_id, 0)
+        positions[exam.sprint_id] = exam.sprint_position + 1
+
+    Exam.objects.bulk_update(exams, ['sprint_position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_exam_single_page'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='sprint_position',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Позиция в спринте'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['sprint', 'sprint_position'], name='exam_sprint_position_idx'),
+        ),
+        migrations.RunPython(
+            fill_sprint_positions, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_exam_sprint_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_revision', models.DateTimeField(blank=True, null=True, verbose_name='Редакция тестирования')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Завершенных попыток')),
+                ('alpha', models.FloatField(blank=True, null=True, verbose_name='Альфа Кронбаха')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата расчета')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='exams.exam', verbose_name='Тестирование')),
+            ],
+            options={
+                'verbose_name': 'Анализ теста',
+                'verbose_name_plural': 'Анализ тестов',
+                'ordering': ['-updated'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Ответов')),
+                ('difficulty', models.FloatField(blank=True, null=True, verbose_name='Доля верных ответов')),
+                ('discrimination', models.FloatField(blank=True, null=True, verbose_name='Точечно-бисериальная корреляция')),
+                ('distractors', models.JSONField(default=list, verbose_name='Выбор вариантов ответа')),
+                ('analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='exams.examanalysis', verbose_name='Анализ теста')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='exams.question', verbose_name='Вопрос')),
+            ],
+            options={
+                'verbose_name': 'Анализ вопроса',
+                'verbose_name_plural': 'Анализ вопросов',
+                'ordering': ['analysis', 'question'],
+            },
+        ),
+    ]
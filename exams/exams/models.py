@@ -39,6 +39,12 @@ class Category(models.Model):
         ]
     )
 
+    exams_count = models.PositiveIntegerField(
+        verbose_name='Тестов',
+        default=0,
+        editable=False
+    )
+
     objects = managers.CategoryManager()
 
     class Meta:
@@ -84,6 +90,17 @@ class Sprint(models.Model):
         auto_now_add=True
     )
 
+    exams_count = models.PositiveIntegerField(
+        verbose_name='Тестов',
+        default=0,
+        editable=False
+    )
+    questions_count = models.PositiveIntegerField(
+        verbose_name='Вопросов',
+        default=0,
+        editable=False
+    )
+
     objects = managers.SprintManager()
 
     class Meta:
@@ -208,6 +225,12 @@ class Exam(models.Model):
         help_text='Только для типов вопросов с несколькими вариантами ответов',
         default=False
     )
+    single_page = models.BooleanField(
+        verbose_name='Все вопросы на одной странице',
+        help_text=('Тест отправляется одной формой и проверяется целиком '
+                   'после ответа на все вопросы'),
+        default=False
+    )
     priority = models.PositiveIntegerField(
         verbose_name='Приоритет',
         help_text=('Влияет на порядок выдачи теста, '
@@ -230,12 +253,51 @@ class Exam(models.Model):
         default=False
     )
 
+    questions_count = models.PositiveIntegerField(
+        verbose_name='Вопросов',
+        default=0,
+        editable=False
+    )
+    users_count = models.PositiveIntegerField(
+        verbose_name='Пользователей завершивших тест',
+        default=0,
+        editable=False
+    )
+    answers_count = models.PositiveIntegerField(
+        verbose_name='Ответов в завершенных попытках',
+        default=0,
+        editable=False
+    )
+    correct_answers_count = models.PositiveIntegerField(
+        verbose_name='Верных ответов в завершенных попытках',
+        default=0,
+        editable=False
+    )
+    average_progress = models.PositiveIntegerField(
+        verbose_name='Процент верных ответов пользователей',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    sprint_position = models.PositiveIntegerField(
+        verbose_name='Позиция в спринте',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     objects = managers.ExamManager()
 
     class Meta:
         verbose_name = 'Тест'
         verbose_name_plural = 'Тесты'
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['sprint', 'sprint_position'],
+                name='exam_sprint_position_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.title}'
@@ -338,6 +400,9 @@ class Question(models.Model):
 
 
 class Variant(models.Model):
+    # selected variants are stored as a 63-bit mask on UserAnswer
+    MAX_PER_QUESTION = 63
+
     text = models.TextField(
         verbose_name='Текст варианта ответа'
     )
@@ -375,3 +440,125 @@ class Variant(models.Model):
         if len(self.text) > 48:
             return f'{self.text[:48]}...'
         return f'{self.text}'
+
+
+class QuestionStats(models.Model):
+    question = models.ForeignKey(
+        Question,
+        verbose_name='Вопрос',
+        related_name='stats',
+        on_delete=models.CASCADE
+    )
+    exam_revision = models.DateTimeField(
+        verbose_name='Редакция тестирования',
+        null=True,
+        blank=True
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Ответов',
+        default=0
+    )
+    correct_count = models.PositiveIntegerField(
+        verbose_name='Верных ответов',
+        default=0
+    )
+    correct_percentage = models.PositiveIntegerField(
+        verbose_name='Процент верных ответов',
+        default=0
+    )
+
+    objects = managers.QuestionStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика вопроса'
+        verbose_name_plural = 'Статистика вопросов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['question', 'exam_revision'],
+                name='unique_question_revision_stats'
+            ),
+            models.UniqueConstraint(
+                fields=['question'],
+                condition=models.Q(exam_revision__isnull=True),
+                name='unique_question_without_revision_stats'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.question_id} ({self.exam_revision})'
+
+
+class ExamAnalysis(models.Model):
+    exam = models.ForeignKey(
+        Exam,
+        verbose_name='Тестирование',
+        related_name='analyses',
+        on_delete=models.CASCADE
+    )
+    exam_revision = models.DateTimeField(
+        verbose_name='Редакция тестирования',
+        null=True,
+        blank=True
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Завершенных попыток',
+        default=0
+    )
+    alpha = models.FloatField(
+        verbose_name='Альфа Кронбаха',
+        null=True,
+        blank=True
+    )
+    updated = models.DateTimeField(
+        verbose_name='Дата расчета',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Анализ теста'
+        verbose_name_plural = 'Анализ тестов'
+        ordering = ['-updated']
+
+    def __str__(self):
+        return f'{self.exam_id} ({self.exam_revision})'
+
+
+class QuestionAnalysis(models.Model):
+    analysis = models.ForeignKey(
+        ExamAnalysis,
+        verbose_name='Анализ теста',
+        related_name='questions',
+        on_delete=models.CASCADE
+    )
+    question = models.ForeignKey(
+        Question,
+        verbose_name='Вопрос',
+        related_name='analyses',
+        on_delete=models.CASCADE
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Ответов',
+        default=0
+    )
+    difficulty = models.FloatField(
+        verbose_name='Доля верных ответов',
+        null=True,
+        blank=True
+    )
+    discrimination = models.FloatField(
+        verbose_name='Точечно-бисериальная корреляция',
+        null=True,
+        blank=True
+    )
+    distractors = models.JSONField(
+        verbose_name='Выбор вариантов ответа',
+        default=list
+    )
+
+    class Meta:
+        verbose_name = 'Анализ вопроса'
+        verbose_name_plural = 'Анализ вопросов'
+        ordering = ['analysis', 'question']
+
+    def __str__(self):
+        return f'{self.question_id} ({self.analysis_id})'
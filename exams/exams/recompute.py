@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Exam, Question
+from .snapshots import build_exam_snapshot
+from .utils import (update_category_counters, update_exam_counters,
+                    update_sprint_counters, update_sprint_positions)
+
+
+class PendingRecompute:
+    """Ids touched in the current transaction, recomputed once on commit."""
+
+    def __init__(self) -> None:
+        self.questions = set()
+        self.exam_questions = set()
+        self.exams = set()
+        self.revisions = set()
+        self.snapshots = set()
+        self.categories = set()
+        self.sprints = set()
+        self.positions = set()
+
+    def __call__(self) -> None:
+        recompute(self)
+
+
+def get_pending() -> tuple:
+    connection = transaction.get_connection()
+    pending = getattr(connection, 'exams_pending', None)
+    scheduled = pending is not None and any(
+        hook[1] is pending for hook in connection.run_on_commit
+    )
+    if not scheduled:
+        pending = PendingRecompute()
+        connection.exams_pending = pending
+    return pending, scheduled
+
+
+def mark_dirty(**ids) -> None:
+    """Add ids to the pending sets named by the keyword arguments."""
+    pending, scheduled = get_pending()
+
+    for name, values in ids.items():
+        getattr(pending, name).update(
+            value for value in values if value is not None
+        )
+    if not scheduled:
+        transaction.on_commit(pending)
+
+
+def get_question_active(question_type: str, empty_answers: bool,
+                        variants_count: int, correct_count: int) -> bool:
+    if not variants_count:
+        return False
+    if question_type == Question.ONE_CORRECT:
+        return correct_count == 1
+    if question_type == Question.MANY_CORRECT and empty_answers:
+        return True
+    return correct_count > 0
+
+
+def recompute_questions(pending: PendingRecompute) -> None:
+    if not pending.questions and not pending.exam_questions:
+        return
+
+    questions = (
+        Question.objects
+        .filter(
+            Q(id__in=pending.questions)
+            | Q(exam_id__in=pending.exam_questions)
+        )
+        .annotate(
+            variants_count=Count('variants'),
+            correct_count=Count(
+                'variants', filter=Q(variants__correct=True)
+            )
+        )
+        .values_list(
+            'id', 'exam_id', 'active', 'type', 'exam__empty_answers',
+            'variants_count', 'correct_count'
+        )
+    )
+    changed = {True: [], False: []}
+
+    for question_id, exam_id, active, *counters in questions:
+        pending.exams.add(exam_id)
+        if question_id in pending.questions:
+            pending.revisions.add(exam_id)
+
+        recomputed = get_question_active(*counters)
+        if recomputed != active:
+            changed[recomputed].append(question_id)
+
+    for active, question_ids in changed.items():
+        if question_ids:
+            Question.objects.filter(id__in=question_ids).update(
+                active=active
+            )
+
+
+def recompute_exams(pending: PendingRecompute) -> None:
+    exams = Exam.objects.filter(id__in=pending.exams)
+    exams.update(active=Exists(Question.objects.filter(
+        exam=OuterRef('pk'), active=True, visibility=True
+    )))
+    update_exam_counters(list(pending.exams), fields=('questions_count',))
+
+    for category_id, sprint_id in exams.values_list(
+        'category_id', 'sprint_id'
+    ):
+        pending.categories.add(category_id)
+        pending.sprints.add(sprint_id)
+
+    revised = Exam.objects.filter(
+        id__in=pending.revisions, active=True, visibility=True
+    )
+    pending.snapshots.update(revised.values_list('id', flat=True))
+    revised.update(revision=timezone.now())
+
+
+def recompute(pending: PendingRecompute) -> None:
+    with transaction.atomic():
+        recompute_questions(pending)
+        if pending.exams:
+            recompute_exams(pending)
+        if pending.categories:
+            update_category_counters(list(pending.categories))
+        if pending.sprints:
+            update_sprint_counters(list(pending.sprints))
+        if pending.positions:
+            update_sprint_positions(list(pending.positions))
+
+    for exam_id in pending.snapshots:
+        build_exam_snapshot(exam_id)
@@ -0,0 +1,126 @@
+from typing import NamedTuple
+
+from django.core.cache import cache
+
+from .models import Exam, Question, Variant
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 24 * 30
+
+
+class VariantSnapshot(NamedTuple):
+    id: int
+    text: str
+    correct: bool
+
+
+class QuestionSnapshot(NamedTuple):
+    id: int
+    type: str
+    text: str
+    description: str
+    success_message: str
+    variants: tuple
+
+    @property
+    def one_correct(self):
+        return self.type == Question.ONE_CORRECT
+
+    @property
+    def many_correct(self):
+        return self.type == Question.MANY_CORRECT
+
+    @property
+    def text_answer(self):
+        return self.type == Question.TEXT_ANSWER
+
+
+class ExamSnapshot(NamedTuple):
+    """Published questions of one exam revision, never changed in place."""
+
+    exam_id: int
+    revision: object
+    questions: tuple
+    positions: dict
+
+    @property
+    def question_ids(self) -> list:
+        return [question.id for question in self.questions]
+
+    def get_question(self, question_id: int) -> QuestionSnapshot:
+        position = self.positions.get(question_id)
+        if position is None:
+            return None
+        return self.questions[position]
+
+
+def get_snapshot_key(exam_id: int, revision: object) -> str:
+    version = int(revision.timestamp() * 1000000) if revision else 0
+    return f'exam-snapshot:{exam_id}:{version}'
+
+
+def compile_exam(exam: object) -> ExamSnapshot:
+    questions = list(
+        Question.objects
+        .filter(exam=exam.id, active=True, visibility=True)
+        .order_by('priority', 'id')
+        .values_list(
+            'id', 'type', 'text', 'description', 'success_message'
+        )
+    )
+    variants = {question[0]: [] for question in questions}
+
+    for question_id, *variant in (
+        Variant.objects
+        .filter(question_id__in=variants)
+        .order_by('priority', 'id', 'text')
+        .values_list('question_id', 'id', 'text', 'correct')
+    ):
+        variants[question_id].append(VariantSnapshot(*variant))
+
+    compiled = tuple(
+        QuestionSnapshot(*question, variants=tuple(variants[question[0]]))
+        for question in questions
+    )
+    return ExamSnapshot(
+        exam_id=exam.id,
+        revision=exam.revision,
+        questions=compiled,
+        positions={
+            question.id: position
+            for position, question in enumerate(compiled)
+        }
+    )
+
+
+def get_exam_snapshot(exam: object) -> ExamSnapshot:
+    key = get_snapshot_key(exam.id, exam.revision)
+    snapshot = cache.get(key)
+
+    if snapshot is None:
+        snapshot = compile_exam(exam)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def get_progress_snapshot(progress: object) -> ExamSnapshot:
+    """Snapshot of the revision the attempt started on, while cached."""
+    exam = progress.exam
+
+    if progress.exam_revision and progress.exam_revision != exam.revision:
+        snapshot = cache.get(
+            get_snapshot_key(exam.id, progress.exam_revision)
+        )
+        if snapshot is not None:
+            return snapshot
+    return get_exam_snapshot(exam)
+
+
+def build_exam_snapshot(exam_id: int) -> None:
+    exam = (
+        Exam.objects
+        .filter(id=exam_id, active=True, visibility=True)
+        .only('id', 'revision')
+        .first()
+    )
+    if exam:
+        get_exam_snapshot(exam)
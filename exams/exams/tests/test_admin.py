@@ -0,0 +1,34 @@
+from core.testing import ChangelistQueriesMixin
+from django.test import TestCase
+
+from exams.models import Category, Exam, Question, Sprint, Variant
+from users.models import User
+
+
+class ChangelistQueriesTest(ChangelistQueriesMixin, TestCase):
+
+    def add_rows(self, start, count):
+        for number in range(start, start + count):
+            author = User.objects.create_user(
+                username=f'author{number}', email=f'author{number}@example.com'
+            )
+            category = Category.objects.create(title=f'Категория {number}')
+            sprint = Sprint.objects.create(title=f'Спринт {number}')
+            exam = Exam.objects.create(
+                title=f'Тест {number}', description='Описание',
+                category=category, sprint=sprint, author=author
+            )
+            question = Question.objects.create(
+                exam=exam, text='Вопрос', type=Question.ONE_CORRECT
+            )
+            Variant.objects.create(question=question, text='Верно',
+                                   correct=True)
+
+    def test_category_changelist(self):
+        self.assert_changelist_queries(Category)
+
+    def test_sprint_changelist(self):
+        self.assert_changelist_queries(Sprint)
+
+    def test_exam_changelist(self):
+        self.assert_changelist_queries(Exam)
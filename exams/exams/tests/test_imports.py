@@ -0,0 +1,79 @@
+import io
+import json
+
+from django.test import TestCase
+
+from exams.imports import ExamImportError, import_exams
+from exams.models import Exam
+
+
+class MalformedImportTest(TestCase):
+
+    def assert_import_error(self, content, import_format):
+        with self.assertRaises(ExamImportError):
+            import_exams(io.BytesIO(content), import_format, 'Тест')
+
+    def get_json(self, question):
+        return json.dumps({'title': 'Тест', 'questions': [question]}).encode()
+
+    def test_not_utf8_csv(self):
+        content = (
+            'exam,category,sprint,question,type,variant,correct\n'
+            'Тест,,,Вопрос,one_correct,Ответ,1\n'
+        ).encode('cp1251')
+        self.assert_import_error(content, 'csv')
+
+    def test_not_utf8_gift(self):
+        self.assert_import_error('Вопрос {=Да ~Нет}'.encode('cp1251'), 'gift')
+
+    def test_unhashable_type(self):
+        self.assert_import_error(
+            self.get_json({'text': 'Вопрос', 'type': ['x']}), 'json'
+        )
+
+    def test_variants_not_objects(self):
+        self.assert_import_error(
+            self.get_json({
+                'text': 'Вопрос', 'type': 'one_correct', 'variants': ['a']
+            }),
+            'json'
+        )
+
+    def test_questions_not_list(self):
+        self.assert_import_error(
+            json.dumps({'title': 'Тест', 'questions': 'a'}).encode(), 'json'
+        )
+
+    def test_xml_fraction(self):
+        content = (
+            '<quiz><question type="multichoice">'
+            '<questiontext><text>Вопрос</text></questiontext>'
+            '<answer fraction="abc"><text>Ответ</text></answer>'
+            '</question></quiz>'
+        ).encode()
+        self.assert_import_error(content, 'xml')
+
+    def test_long_category_title(self):
+        self.assert_import_error(
+            json.dumps({'title': 'Тест', 'category': 'к' * 201}).encode(),
+            'json'
+        )
+
+    def test_long_sprint_title(self):
+        self.assert_import_error(
+            json.dumps({'title': 'Тест', 'sprint': 'с' * 201}).encode(),
+            'json'
+        )
+
+    def test_record_visibility_is_ignored(self):
+        content = json.dumps({
+            'title': 'Тест', 'visibility': True, 'questions': [{
+                'text': 'Вопрос', 'type': 'one_correct',
+                'variants': [{'text': 'Ответ', 'correct': True}]
+            }]
+        }).encode()
+        with self.captureOnCommitCallbacks(execute=True):
+            import_exams(io.BytesIO(content), 'json', 'Тест')
+        exam = Exam.objects.get(title='Тест')
+        self.assertTrue(exam.active)
+        self.assertFalse(exam.visibility)
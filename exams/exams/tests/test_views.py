@@ -0,0 +1,176 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from exams.models import Category, Exam, Question, QuestionStats, Variant
+from progress.models import Progress
+from users.models import User
+
+
+class HiddenQuestionMixin:
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='student', email='student@example.com', password='x'
+        )
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(title='Категория')
+            self.exam = Exam.objects.create(
+                title='Тест', description='Описание', category=category,
+                visibility=True, show_results=False
+            )
+            self.questions = []
+            for number in range(3):
+                question = Question.objects.create(
+                    exam=self.exam, text=f'Вопрос {number}',
+                    type=Question.ONE_CORRECT, visibility=True
+                )
+                Variant.objects.create(
+                    question=question, text='Верно', correct=True
+                )
+                Variant.objects.create(
+                    question=question, text='Неверно', correct=False
+                )
+                self.questions.append(question)
+
+    def hide_question(self, question):
+        with self.captureOnCommitCallbacks(execute=True):
+            question.visibility = False
+            question.save()
+
+
+class ExamProcessHiddenQuestionTest(HiddenQuestionMixin, TestCase):
+
+    def get_stage_url(self, stage):
+        return reverse(
+            'exams:exam_process', kwargs={'slug': self.exam.slug, 'pk': stage}
+        )
+
+    def answer_question(self, stage):
+        response = self.client.get(self.get_stage_url(stage))
+        self.assertEqual(response.status_code, 200)
+        variant = response.context['question'].variants[0]
+        self.assertTrue(variant.correct)
+        return self.client.post(
+            self.get_stage_url(stage), {'result': str(variant.id)}
+        )
+
+    def answer_first_question(self):
+        self.answer_question(1)
+
+    def test_attempt_keeps_started_revision(self):
+        self.answer_first_question()
+        self.hide_question(self.questions[1])
+
+        response = self.client.get(self.get_stage_url(2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['question'].id, self.questions[1].id)
+
+    def test_missing_question_is_dropped_from_queue(self):
+        self.answer_first_question()
+        self.hide_question(self.questions[1])
+        cache.clear()
+
+        response = self.client.get(self.get_stage_url(2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['question'].id, self.questions[2].id)
+
+        progress = Progress.objects.get(user=self.user, exam=self.exam)
+        self.assertEqual(
+            progress.questions_queue,
+            [self.questions[0].id, self.questions[2].id]
+        )
+        self.assertEqual(progress.stage, 2)
+
+        variant = self.questions[2].variants.get(correct=True)
+        response = self.client.post(
+            self.get_stage_url(2), {'result': str(variant.id)}
+        )
+        self.assertRedirects(
+            response, progress.get_absolute_url(),
+            fetch_redirect_response=False
+        )
+        progress.refresh_from_db()
+        self.assertIsNotNone(progress.finished)
+        self.assertEqual(progress.answers_quantity, 2)
+
+    def test_answered_missing_question_is_not_counted(self):
+        self.answer_question(1)
+        self.answer_question(2)
+        self.hide_question(self.questions[0])
+        cache.clear()
+
+        response = self.client.get(self.get_stage_url(2))
+        self.assertEqual(response.context['question'].id, self.questions[2].id)
+        progress = Progress.objects.get(user=self.user, exam=self.exam)
+        self.assertEqual(
+            (progress.stage, progress.answers_quantity,
+             progress.correct_count),
+            (2, 1, 1)
+        )
+        self.assertFalse(
+            progress.answers.filter(question=self.questions[0]).exists()
+        )
+        self.assertFalse(QuestionStats.objects.filter(
+            question=self.questions[0], attempts__gt=0
+        ).exists())
+
+        self.answer_question(2)
+        progress.refresh_from_db()
+        self.assertIsNotNone(progress.finished)
+        self.assertEqual(
+            (progress.answers_quantity, progress.correct_count,
+             progress.correct_percentage),
+            (2, 2, 100)
+        )
+        self.assertEqual(len(progress.result.answers), 2)
+
+    def test_last_missing_question_finishes_attempt(self):
+        self.answer_first_question()
+        for question in self.questions[1:]:
+            self.hide_question(question)
+        cache.clear()
+
+        progress = Progress.objects.get(user=self.user, exam=self.exam)
+        response = self.client.get(self.get_stage_url(2))
+        self.assertRedirects(
+            response, progress.get_absolute_url(),
+            fetch_redirect_response=False
+        )
+        progress.refresh_from_db()
+        self.assertIsNotNone(progress.finished)
+
+
+class ExamSinglePageHiddenQuestionTest(HiddenQuestionMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        Exam.objects.filter(id=self.exam.id).update(single_page=True)
+        self.url = reverse(
+            'exams:exam_single_page', kwargs={'slug': self.exam.slug}
+        )
+
+    def test_missing_question_is_not_counted(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['form'].questions), 3)
+
+        self.hide_question(self.questions[1])
+        cache.clear()
+
+        data = {
+            f'{question.id}-result': str(
+                question.variants.get(correct=True).id
+            )
+            for question in (self.questions[0], self.questions[2])
+        }
+        response = self.client.post(self.url, data)
+        progress = Progress.objects.get(user=self.user, exam=self.exam)
+        self.assertRedirects(
+            response, progress.get_absolute_url(),
+            fetch_redirect_response=False
+        )
+        self.assertEqual(progress.answers_quantity, 2)
+        self.assertEqual(progress.stage, 3)
+        self.assertEqual(progress.correct_percentage, 100)
@@ -35,4 +35,9 @@ urlpatterns = [
         views.ExamProcessView.as_view(),
         name='exam_process'
     ),
+    path(
+        'exam/<slug:slug>/single-page/',
+        views.ExamSinglePageView.as_view(),
+        name='exam_single_page'
+    ),
 ]
@@ -1,3 +1,12 @@
+from django.db.models import (Case, Count, F, IntegerField, OuterRef, Q,
+                              Subquery, Sum, When)
+from django.db.models.functions.comparison import Coalesce, NullIf
+from django.utils import timezone
+from progress.models import Progress, UserAnswer, UserSprint
+
+from .models import Category, Exam, Question, Sprint
+
+
 def get_humanize_time(minutes):
     if minutes < 60:
         humanize_time = f'{minutes} мин.'
@@ -7,29 +16,184 @@ def get_humanize_time(minutes):
     return humanize_time
 
 
-def get_next_exam_in_sprint(exam: object) -> object or None:
-    exams_in_sprint = list(
-        exam.sprint.exams.all().order_by('priority', '-created')
+SPRINT_ORDERING = ('priority', '-created', '-id')
+
+
+def get_exam_in_sprint(exam: object, offset: int) -> object or None:
+    if exam.sprint_id is None or exam.sprint_position is None:
+        return None
+
+    return (
+        Exam.objects
+        .filter(
+            sprint_id=exam.sprint_id,
+            sprint_position=exam.sprint_position + offset
+        )
+        .first()
     )
-    exam_index = exams_in_sprint.index(exam)
 
-    if exam_index < len(exams_in_sprint) - 1:
-        next_exam = exams_in_sprint[exam_index + 1]
-    else:
-        next_exam = None
 
-    return next_exam
+def get_next_exam_in_sprint(exam: object) -> object or None:
+    return get_exam_in_sprint(exam, 1)
 
 
 def get_previous_exam_in_sprint(exam: object) -> object or None:
-    exams_in_sprint = list(
-        exam.sprint.exams.all().order_by('priority', '-created')
+    return get_exam_in_sprint(exam, -1)
+
+
+def update_sprint_positions(sprint_ids: list) -> None:
+    exams = (
+        Exam.objects
+        .filter(sprint_id__in=[i for i in sprint_ids if i is not None])
+        .order_by('sprint_id', *SPRINT_ORDERING)
+        .only('id', 'sprint_id', 'sprint_position')
     )
-    exam_index = exams_in_sprint.index(exam)
+    positions = {}
+    for_update = []
+
+    for exam in exams:
+        position = positions.get(exam.sprint_id, 0)
+        positions[exam.sprint_id] = position + 1
+
+        if exam.sprint_position != position:
+            exam.sprint_position = position
+            for_update.append(exam)
+
+    Exam.objects.bulk_update(for_update, ['sprint_position'])
+
+
+def get_count(queryset: object, field: str, expression: object = None):
+    expression = expression or Count('id')
+    count = Subquery(
+        queryset
+        .values(field)
+        .annotate(value=expression)
+        .values('value'),
+        output_field=IntegerField()
+    )
+    return Coalesce(count, 0)
+
+
+def get_exam_counters() -> dict:
+    questions = Question.objects.filter(
+        exam=OuterRef('pk'), active=True, visibility=True
+    )
+    finished = Progress.objects.filter(
+        exam=OuterRef('pk'), finished__isnull=False
+    )
+    answers = UserAnswer.objects.filter(
+        progress__exam=OuterRef('pk'), progress__finished__isnull=False
+    )
+    return {
+        'questions_count': get_count(questions, 'exam'),
+        'users_count': get_count(
+            finished, 'exam', Count('user', distinct=True)
+        ),
+        'answers_count': get_count(answers, 'progress__exam'),
+        'correct_answers_count': get_count(
+            answers.filter(correct=True), 'progress__exam'
+        )
+    }
 
-    if exam_index > 0:
-        next_exam = exams_in_sprint[exam_index - 1]
-    else:
-        next_exam = None
 
-    return next_exam
+def get_category_counters() -> dict:
+    exams = Exam.objects.filter(
+        category=OuterRef('pk'), active=True, visibility=True
+    )
+    return {'exams_count': get_count(exams, 'category')}
+
+
+def get_sprint_counters() -> dict:
+    exams = Exam.objects.filter(sprint=OuterRef('pk'))
+    return {
+        'exams_count': get_count(
+            exams.filter(active=True, visibility=True), 'sprint'
+        ),
+        'questions_count': get_count(
+            exams, 'sprint', Sum('questions_count')
+        )
+    }
+
+
+def update_exam_counters(exam_ids: list = None,
+                         fields: tuple = None) -> None:
+    exams = Exam.objects.all()
+    counters = get_exam_counters()
+    if exam_ids is not None:
+        exams = exams.filter(id__in=exam_ids)
+    if fields is not None:
+        counters = {field: counters[field] for field in fields}
+    exams.update(**counters)
+    if 'answers_count' in counters:
+        exams.update(average_progress=(
+            NullIf(F('correct_answers_count'), 0) * 100
+            / NullIf(F('answers_count'), 0)
+        ))
+
+
+def update_category_counters(category_ids: list = None) -> None:
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(id__in=category_ids)
+    categories.update(**get_category_counters())
+
+
+def update_sprint_counters(sprint_ids: list = None) -> None:
+    sprints = Sprint.objects.all()
+    if sprint_ids is not None:
+        sprints = sprints.filter(id__in=sprint_ids)
+    sprints.update(**get_sprint_counters())
+
+
+def update_user_sprint_counters(sprint_ids: list) -> None:
+    passed = Progress.objects.filter(
+        user=OuterRef('user'), exam__sprint=OuterRef('sprint'), passed=True
+    )
+    UserSprint.objects.filter(sprint_id__in=sprint_ids).update(
+        passed_count=get_count(passed, 'user', Count('exam', distinct=True))
+    )
+
+
+def register_finished_progress(progress: object, answers_count: int,
+                               correct_count: int) -> None:
+    first_finish = not (
+        Progress.objects
+        .filter(
+            user_id=progress.user_id,
+            exam_id=progress.exam_id,
+            finished__isnull=False
+        )
+        .exclude(id=progress.id)
+        .exists()
+    )
+    Exam.objects.filter(id=progress.exam_id).update(
+        users_count=F('users_count') + int(first_finish),
+        answers_count=F('answers_count') + answers_count,
+        correct_answers_count=F('correct_answers_count') + correct_count,
+        average_progress=(
+            NullIf(F('correct_answers_count') + correct_count, 0) * 100
+            / NullIf(F('answers_count') + answers_count, 0)
+        )
+    )
+
+
+def register_sprint_pass(user_id: int, exam: object, first_pass: bool) -> None:
+    sprint = exam.sprint
+    complete = Q(finished__isnull=True)
+
+    if sprint.any_order:
+        complete &= Q(passed_count__gte=sprint.exams_count - int(first_pass))
+    elif get_next_exam_in_sprint(exam) is not None:
+        complete = None
+
+    if complete is None and not first_pass:
+        return
+
+    update = {'passed_count': F('passed_count') + int(first_pass)}
+    if complete is not None:
+        update['finished'] = Case(
+            When(complete, then=timezone.now()), default=F('finished')
+        )
+    UserSprint.objects.filter(user_id=user_id, sprint_id=sprint.id).update(
+        **update
+    )
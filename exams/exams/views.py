@@ -1,17 +1,20 @@
+from core.pagination import KeysetPaginationMixin
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import (Count, ExpressionWrapper, F, IntegerField,
-                              Prefetch, Q)
-from django.db.models.functions.comparison import NullIf
+from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
 from django.views.generic import DetailView, FormView, ListView
-from progress.models import Progress, UserAnswer, UserSprint, UserVariant
+from progress.models import (Progress, ProgressResult, UserAnswer,
+                             UserExamState, UserSprint)
+from users.models import UserStats
 
-from .forms import ExamProcessForm
-from .models import Category, Exam, Question, Sprint, Variant
-from .utils import (get_humanize_time, get_next_exam_in_sprint,
-                    get_previous_exam_in_sprint)
+from .forms import ExamProcessForm, ExamSinglePageForm
+from .models import Category, Exam, QuestionStats, Sprint
+from .snapshots import get_progress_snapshot
+from .utils import (get_humanize_time, get_previous_exam_in_sprint,
+                    register_finished_progress, register_sprint_pass)
 
 
 class IndexView(ListView):
@@ -30,11 +33,11 @@ class IndexView(ListView):
         )
         extra_context = {
             'title': 'Exams',
-            'exams': exams[:12]
+            'exams': list(exams[:12])
         }
         if settings.DEMO_MODE:
             extra_context['title'] = 'Exams - Demo'
-        if len(exams) > 5:
+        if len(extra_context['exams']) > 5:
             extra_context['more_link'] = True
         context.update(extra_context)
         return context
@@ -80,11 +83,12 @@ class SprintDetailView(ListView):
         return context
 
 
-class ExamListView(ListView):
+class ExamListView(KeysetPaginationMixin, ListView):
     model = Exam
     template_name = 'exams/exam_list.html'
     context_object_name = 'exams'
     paginate_by = 18
+    keyset_ordering = ('-created', '-id')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -127,8 +131,6 @@ class ExamDetailView(DetailView):
             Exam.objects
             .filter(slug=slug, active=True, visibility=True)
             .select_related('category', 'sprint')
-            .users_stats()
-            .questions_count()
         )
         return get_object_or_404(exam)
 
@@ -140,12 +142,9 @@ class ExamDetailView(DetailView):
         if self.request.user.is_authenticated:
             progress = (
                 Exam.objects
-                .filter(
-                    slug=slug, progress__user=self.request.user,
-                    active=True, visibility=True
-                )
-                .with_request_user_progress()
-                .order_by('-started')
+                .filter(slug=slug, active=True, visibility=True)
+                .with_user_latest_progress(self.request.user)
+                .filter(progress_id__isnull=False)
                 .first()
             )
             context.update(
@@ -175,16 +174,14 @@ class ExamDetailView(DetailView):
         return context
 
 
-class ExamProcessView(LoginRequiredMixin, FormView):
-    template_name = 'exams/exam_process.html'
-    form_class = ExamProcessForm
+class ExamProgressMixin:
 
     def get_or_create_progress(self):
         progress = (
             Progress.objects
             .filter(user=self.request.user, exam__slug=self.slug)
+            .select_related('exam', 'exam__category', 'exam__sprint')
             .order_by('-started')
-            .get_percentage()
             .first()
         )
         restart = self.request.GET.get('restart')
@@ -229,14 +226,131 @@ class ExamProcessView(LoginRequiredMixin, FormView):
                     exam=exam,
                     exam_revision=exam.revision
                 )
+                UserExamState.objects.sync(progress.id)
         return progress
 
+    def resolve_questions_queue(self):
+        """Questions gone from the exam are dropped from an open attempt."""
+        if not self.progress.questions_queue:
+            self.progress.freeze_questions_queue()
+            Progress.objects.filter(id=self.progress.id).update(
+                questions_queue=self.progress.questions_queue
+            )
+
+        self.snapshot = get_progress_snapshot(self.progress)
+        queue = self.progress.questions_queue
+        resolved = [
+            question_id for question_id in queue
+            if self.snapshot.get_question(question_id) is not None
+        ]
+
+        if self.progress.finished or len(resolved) == len(queue):
+            return
+
+        answered = set(queue[:self.progress.stage - 1])
+        stage = 1 + sum(question_id in answered for question_id in resolved)
+
+        with transaction.atomic():
+            self.drop_answers(set(queue) - set(resolved))
+            Progress.objects.filter(id=self.progress.id).update(
+                questions_queue=resolved, stage=stage,
+                answers_quantity=stage - 1
+            )
+            Progress.objects.recount([self.progress.id])
+            UserExamState.objects.sync(self.progress.id)
+
+        self.progress.refresh_from_db(fields=(
+            'questions_queue', 'stage', 'answers_quantity', 'correct_count',
+            'correct_percentage'
+        ))
+
+    def drop_answers(self, question_ids: set) -> None:
+        answers = UserAnswer.objects.filter(
+            Q(question_id__in=question_ids) | Q(question__isnull=True),
+            progress=self.progress
+        )
+        for question_id, correct in answers.values_list(
+            'question_id', 'correct'
+        ):
+            QuestionStats.objects.unregister_answer(
+                question_id, self.progress.exam_revision, correct
+            )
+        answers.delete()
+
     def get_remaining_time(self):
-        time_to_pass = self.question.exam.timer * 60
+        time_to_pass = self.exam.timer * 60
         current = (timezone.now() - self.progress.started).total_seconds()
         remaining_time = int(time_to_pass - current)
         return remaining_time
 
+    def sprint_finished(self):
+        first_pass = self.progress.finished is None and not (
+            Progress.objects
+            .filter(user=self.request.user, exam=self.exam, passed=True)
+            .exclude(id=self.progress.id)
+            .exists()
+        )
+        register_sprint_pass(self.request.user.id, self.exam, first_pass)
+
+    def finish_progress(self):
+        update = {
+            'finished': timezone.now(),
+            'passed': True
+        }
+        actual_progress = Progress.objects.filter(id=self.progress.id)
+
+        if self.exam.timer and self.get_remaining_time() < 0:
+            update['passed'] = False
+
+        if (
+            self.exam.required_percent
+            and self.exam.required_percent > (
+                actual_progress
+                .values_list('correct_percentage', flat=True)
+                .first()
+            )
+        ):
+            update['passed'] = False
+
+        if self.progress.finished is None:
+            update['attempt'] = Progress.objects.get_next_attempt(
+                self.progress
+            )
+
+        with transaction.atomic():
+            actual_progress.update(**update)
+            state = UserExamState.objects.sync(self.progress.id)
+            ProgressResult.objects.build(self.progress.id)
+
+            if self.progress.finished is None:
+                register_finished_progress(
+                    self.progress, state.answers_quantity,
+                    state.correct_count
+                )
+
+            if update['passed'] is True and self.exam.sprint:
+                self.sprint_finished()
+
+            UserStats.objects.refresh(self.request.user)
+
+
+class ExamProcessView(LoginRequiredMixin, ExamProgressMixin, FormView):
+    template_name = 'exams/exam_process.html'
+    form_class = ExamProcessForm
+
+    def get_questions_status(self):
+        answers = dict(
+            UserAnswer.objects
+            .filter(progress=self.progress)
+            .values_list('question_id', 'correct')
+        )
+        status = [
+            {'answered': question_id in answers,
+             'correct': answers.get(question_id)}
+            for question_id in self.questions_queue
+        ]
+        return status
+
     def dispatch(self, request, *args, **kwargs):
         if not self.request.user.is_authenticated:
             return redirect('users:signup')
@@ -248,39 +362,30 @@ class ExamProcessView(LoginRequiredMixin, FormView):
         if self.progress is False:
             return redirect('exams:exam_detail', self.slug)
 
-        self.questions_queue = (
-            Question.objects
-            .filter(
-                active=True, visibility=True,
-            )
-            .annotate(
-                global_correct_percentage=ExpressionWrapper(
-                    NullIf(Count('answers', distinct=True, filter=Q(
-                        answers__correct=True
-                    )), 0) * 100
-                    / NullIf(Count('answers', distinct=True), 0),
-                    output_field=IntegerField()
-                )
-            )
-            .filter(exam__slug=self.slug)
-            .annotate(
-                corrected=Count('answers__correct', filter=Q(
-                    answers__progress=self.progress,
-                    answers__correct=True
-                )),
-                finished=Count('answers__date', filter=Q(
-                    answers__progress=self.progress,
-                    answers__date__isnull=False
-                ))
-            )
-            .select_related('exam', 'exam__category')
-            .order_by('priority', 'id')
+        if self.progress.exam.single_page:
+            return redirect('exams:exam_single_page', self.slug)
+
+        self.exam = self.progress.exam
+        self.resolve_questions_queue()
+        self.questions_queue = self.progress.questions_queue
+
+        if (
+            self.questions_queue and self.progress.finished is None
+            and self.progress.stage > len(self.questions_queue)
+        ):
+            self.finish_progress()
+            return redirect('progress:progress_detail', pk=self.progress.id)
+
+        if not 0 < self.stage <= len(self.questions_queue):
+            return redirect('exams:exam_detail', self.slug)
+
+        self.question = self.snapshot.get_question(
+            self.questions_queue[self.stage - 1]
         )
 
-        if len(self.questions_queue) < self.stage:
+        if self.question is None:
             return redirect('exams:exam_detail', self.slug)
 
-        self.question = self.questions_queue[self.stage - 1]
         self.last_stage = len(self.questions_queue) == self.stage
         self.answered = self.stage < self.progress.stage
         return super(ExamProcessView, self).dispatch(request, *args, **kwargs)
@@ -288,7 +393,7 @@ class ExamProcessView(LoginRequiredMixin, FormView):
     def get(self, request, *args, **kwargs):
         if (
             self.stage > self.progress.stage
-            or not self.question.exam.show_results
+            or not self.exam.show_results
             and self.stage != self.progress.stage
         ):
             return redirect(
@@ -300,11 +405,9 @@ class ExamProcessView(LoginRequiredMixin, FormView):
 
     def get_initial(self):
         initial = super().get_initial()
-        if self.answered is False:
-            self.variants = Variant.objects.filter(question=self.question)
-            initial['variants'] = self.variants
         self.initial_data = {
             'question': self.question,
+            'exam': self.exam,
             'answered': self.answered,
             'progress': self.progress,
             'user': self.request.user,
@@ -316,85 +419,41 @@ class ExamProcessView(LoginRequiredMixin, FormView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        if self.question.exam.show_results and self.answered:
-            filter_data = {
-                'answer': F('answer')
-            }
-
+        if self.exam.show_results and self.answered:
             answer = (
                 UserAnswer.objects
-                .prefetch_related(Prefetch('variants', queryset=(
-                    UserVariant.objects
-                    .filter(**filter_data)
-                    .order_by('-selected', '?')
-                )))
                 .filter(
                     progress=self.progress,
-                    question=self.question,
+                    question_id=self.question.id,
                 )
-                .get_counters()
-                .order_by('date')
+                .with_question()
+                .order_by('date', 'id')
                 .first()
             )
+            if answer:
+                UserAnswer.objects.attach_variants([answer], texts={
+                    variant.id: variant.text
+                    for variant in self.question.variants
+                })
             extra_context = {
                 'answer': answer,
+                'global_correct_percentage': (
+                    QuestionStats.objects
+                    .global_percentage(self.question.id)
+                ),
                 'last_stage': self.last_stage,
                 'next_stage': self.stage + 1
             }
             context.update(extra_context)
 
-        if self.question.exam.timer:
+        if self.exam.timer:
             context['remaining_time'] = self.get_remaining_time()
-            context['humanize_time'] = get_humanize_time(
-                self.question.exam.timer)
+            context['humanize_time'] = get_humanize_time(self.exam.timer)
 
-        context['questions'] = self.questions_queue
+        context['questions'] = self.get_questions_status()
         context.update(self.initial_data)
         return context
 
-    def sprint_finished(self):
-
-        user_sprint = (
-            UserSprint.objects
-            .filter(
-                user=self.request.user,
-                sprint=self.question.exam.sprint
-            )
-        )
-
-        if not self.question.exam.sprint.any_order:
-            next_exam = get_next_exam_in_sprint(self.question.exam)
-
-            if not next_exam and not user_sprint.first().finished:
-                user_sprint.update(finished=timezone.now())
-
-        else:
-            progress_passed = (
-                Progress.objects
-                .filter(
-                    user=self.request.user,
-                    exam__sprint=self.question.exam.sprint,
-                    passed=True
-                )
-                .distinct('exam')
-                .count()
-            )
-            current_sprint_exams = (
-                Exam.objects
-                .filter(
-                    sprint=self.question.exam.sprint,
-                    active=True,
-                    visibility=True
-                )
-                .count()
-            )
-
-            if (
-                not user_sprint.first().finished
-                and progress_passed >= current_sprint_exams
-            ):
-                user_sprint.update(finished=timezone.now())
-
     def form_valid(self, form):
         data = {
             'stage': self.stage + 1,
@@ -402,50 +461,108 @@ class ExamProcessView(LoginRequiredMixin, FormView):
         }
 
         if self.progress.stage < self.stage + 1:
-            Progress.objects.filter(id=self.progress.id).update(**data)
-
-            match True:
-                case self.question.many_correct:
-                    form.answer_with_many_correct()
-                case self.question.one_correct:
-                    form.answer_with_one_correct()
-                case self.question.text_answer:
-                    form.answer_with_text_answer()
-
-        if self.last_stage:
-            update = {
-                'finished': timezone.now(),
-                'passed': True
-            }
-            actual_progress = (
-                Progress.objects
-                .filter(id=self.progress.id)
-                .get_percentage()
-            )
-
-            if self.question.exam.timer and self.get_remaining_time() < 0:
-                update['passed'] = False
+            with transaction.atomic():
+                Progress.objects.filter(id=self.progress.id).update(**data)
 
-            try:
-                if (
-                    self.question.exam.required_percent
-                    and self.question.exam.required_percent
-                    > actual_progress.first().correct_percentage
-                ):
-                    update['passed'] = False
-            except TypeError:
-                update['passed'] = False
-
-            actual_progress.update(**update)
+                match True:
+                    case self.question.many_correct:
+                        form.answer_with_many_correct()
+                    case self.question.one_correct:
+                        form.answer_with_one_correct()
+                    case self.question.text_answer:
+                        form.answer_with_text_answer()
 
-            if update.get('passed') is True and self.question.exam.sprint:
-                self.sprint_finished()
+            if not self.last_stage:
+                UserExamState.objects.sync(self.progress.id)
 
+        if self.last_stage:
+            self.finish_progress()
             return redirect('progress:progress_detail', pk=self.progress.id)
 
-        elif self.question.exam.show_results:
+        elif self.exam.show_results:
             return redirect(
                 'exams:exam_process', slug=self.slug, pk=self.stage)
         else:
             return redirect(
                 'exams:exam_process', slug=self.slug, pk=self.stage + 1)
+
+
+class ExamSinglePageView(LoginRequiredMixin, ExamProgressMixin, FormView):
+    template_name = 'exams/exam_single_page.html'
+    form_class = ExamSinglePageForm
+
+    def get_questions(self):
+        answered = set(
+            UserAnswer.objects
+            .filter(progress=self.progress)
+            .values_list('question_id', flat=True)
+        )
+        questions = []
+
+        for question_id in self.progress.questions_queue:
+            question = self.snapshot.get_question(question_id)
+
+            if question is None or question_id in answered:
+                continue
+
+            variants = list(question.variants)
+            if self.exam.shuffle_variants:
+                variants = self.progress.shuffled(variants, question_id)
+            questions.append((question, variants))
+        return questions
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.request.user.is_authenticated:
+            return redirect('users:signup')
+
+        self.slug = self.kwargs.get('slug')
+        self.progress = self.get_or_create_progress()
+
+        if self.progress is False:
+            return redirect('exams:exam_detail', self.slug)
+
+        self.exam = self.progress.exam
+
+        if not self.exam.single_page:
+            return redirect(
+                'exams:exam_process', slug=self.slug, pk=self.progress.stage
+            )
+
+        if self.progress.finished:
+            return redirect('progress:progress_detail', pk=self.progress.id)
+
+        self.resolve_questions_queue()
+        self.questions = self.get_questions()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_initial(self):
+        initial = super().get_initial()
+        initial.update({
+            'progress': self.progress,
+            'exam': self.exam,
+            'questions': self.questions
+        })
+        return initial
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        if self.exam.timer:
+            context['remaining_time'] = self.get_remaining_time()
+            context['humanize_time'] = get_humanize_time(self.exam.timer)
+
+        context.update({'exam': self.exam, 'progress': self.progress})
+        return context
+
+    def form_valid(self, form):
+        questions_count = len(self.progress.questions_queue)
+
+        with transaction.atomic():
+            Progress.objects.filter(id=self.progress.id).update(
+                stage=questions_count + 1,
+                answers_quantity=questions_count
+            )
+            form.add_results()
+
+        self.finish_progress()
+        return redirect('progress:progress_detail', pk=self.progress.id)
@@ -1,11 +1,14 @@
 from django.contrib import admin
 
-from .models import Progress, UserSprint
+from .models import Progress, PurgeJob, UserSprint
 
 
 class ProgressAdmin(admin.ModelAdmin):
     list_display = ('user', 'exam', 'exam_revision', 'answers_quantity',
                     'current_stage', 'passed', 'started', 'finished')
+    list_select_related = ('user', 'exam')
+    raw_id_fields = ('user', 'exam')
+    show_full_result_count = False
 
     def has_change_permission(self, request, obj=None):
         return False
@@ -23,7 +26,10 @@ class ProgressAdmin(admin.ModelAdmin):
 
 
 class UserSprintAdmin(admin.ModelAdmin):
-    list_display = ('user', 'sprint', 'started', 'finished')
+    list_display = ('user', 'sprint', 'passed_count', 'started', 'finished')
+    list_select_related = ('user', 'sprint')
+    raw_id_fields = ('user', 'sprint')
+    show_full_result_count = False
 
     def has_change_permission(self, request, obj=None):
         return False
@@ -32,5 +38,28 @@ class UserSprintAdmin(admin.ModelAdmin):
         return False
 
 
+class PurgeJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'description', 'status', 'progress_percentage',
+                    'deleted', 'total', 'author', 'created', 'finished')
+    list_filter = ('status',)
+    list_select_related = ('author',)
+    readonly_fields = ('description', 'status', 'progress_percentage',
+                       'deleted', 'total', 'error', 'author', 'created',
+                       'started', 'heartbeat', 'finished')
+    exclude = ('exam_ids', 'sprint_ids', 'user_ids')
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def progress_percentage(self, obj):
+        return f'{obj.percentage}%'
+
+    progress_percentage.short_description = 'Выполнено'
+
+
 admin.site.register(Progress, ProgressAdmin)
 admin.site.register(UserSprint, UserSprintAdmin)
+admin.site.register(PurgeJob, PurgeJobAdmin)
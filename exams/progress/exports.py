@@ -0,0 +1,177 @@
+import csv
+import json
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils.timezone import make_aware
+
+from exams.models import Variant
+
+from .models import Progress, UserAnswer, UserVariant
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+ATTEMPT_FIELDS = (
+    'id', 'username', 'exam_title', 'category_title', 'sprint_title',
+    'attempt', 'started', 'finished', 'passed', 'answers_quantity',
+    'correct_count', 'correct_percentage'
+)
+
+ANSWER_FIELDS = ('question_id', 'question_text', 'correct', 'no_answers',
+                 'selected')
+
+RELATION_FILTERS = {
+    'exam': 'exam',
+    'sprint': 'exam__sprint',
+    'category': 'exam__category',
+    'user': 'user'
+}
+
+
+def get_export_queryset(filters: dict) -> object:
+    queryset = Progress.objects.filter(finished__isnull=False)
+
+    for name, lookup in RELATION_FILTERS.items():
+        if filters.get(name):
+            queryset = queryset.filter(**{lookup: filters[name]})
+
+    if filters.get('date_from'):
+        queryset = queryset.filter(finished__gte=make_aware(
+            datetime.combine(filters['date_from'], time.min)
+        ))
+
+    if filters.get('date_to'):
+        queryset = queryset.filter(finished__lt=make_aware(
+            datetime.combine(filters['date_to'] + timedelta(days=1), time.min)
+        ))
+
+    return (
+        queryset
+        .order_by('id')
+        .values(
+            'id', 'attempt', 'started', 'finished', 'passed',
+            'answers_quantity', 'correct_count', 'correct_percentage',
+            username=F('user__username'),
+            exam_title=F('exam__title'),
+            category_title=F('exam__category__title'),
+            sprint_title=F('exam__sprint__title')
+        )
+    )
+
+
+def attach_answers(attempts: list) -> list:
+    answers = {attempt['id']: [] for attempt in attempts}
+    selected = defaultdict(list)
+
+    for answer_id, text in (
+        UserVariant.objects
+        .filter(answer__progress_id__in=answers, selected=True)
+        .order_by('id')
+        .values_list('answer_id', 'variant_text')
+    ):
+        selected[answer_id].append(text)
+
+    rows = list(
+        UserAnswer.objects
+        .filter(progress_id__in=answers)
+        .order_by('progress_id', 'date', 'id')
+        .values(
+            'id', 'progress_id', 'question_id', 'correct', 'no_answers',
+            'variant_ids', 'selected_mask', 'text_answer',
+            question_text=F('question__text')
+        )
+    )
+    texts = dict(
+        Variant.objects
+        .filter(id__in={
+            variant_id for row in rows for variant_id in row['variant_ids']
+        })
+        .values_list('id', 'text')
+    )
+
+    for answer in rows:
+        answer_id = answer.pop('id')
+        variant_ids = answer.pop('variant_ids')
+        selected_mask = answer.pop('selected_mask')
+        text_answer = answer.pop('text_answer')
+
+        if variant_ids:
+            selected[answer_id] = [
+                texts.get(variant_id)
+                for position, variant_id in enumerate(variant_ids)
+                if selected_mask >> position & 1
+            ]
+            if text_answer is not None and not selected[answer_id]:
+                selected[answer_id] = [text_answer]
+
+        answer['selected'] = selected[answer_id]
+        answers[answer.pop('progress_id')].append(answer)
+
+    for attempt in attempts:
+        attempt['answers'] = answers[attempt['id']]
+    return attempts
+
+
+def iter_attempts(queryset: object, chunk_size: int = 2000) -> object:
+    chunk = []
+
+    for attempt in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(attempt)
+
+        if len(chunk) >= chunk_size:
+            yield from attach_answers(chunk)
+            chunk = []
+
+    if chunk:
+        yield from attach_answers(chunk)
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(attempts: object) -> object:
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        ('progress_id',) + ATTEMPT_FIELDS[1:]
+        + ('question_id', 'question_text', 'answer_correct', 'no_answers',
+           'selected')
+    )
+
+    for attempt in attempts:
+        row = [attempt[field] for field in ATTEMPT_FIELDS]
+
+        if not attempt['answers']:
+            yield writer.writerow(row)
+
+        for answer in attempt['answers']:
+            answer['selected'] = '; '.join(
+                text for text in answer['selected'] if text
+            )
+            yield writer.writerow(
+                row + [answer[field] for field in ANSWER_FIELDS]
+            )
+
+
+def iter_ndjson(attempts: object) -> object:
+    for attempt in attempts:
+        yield json.dumps(
+            attempt, cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
+
+
+def iter_export(filters: dict, chunk_size: int = 2000) -> object:
+    attempts = iter_attempts(get_export_queryset(filters), chunk_size)
+
+    if filters['format'] == 'ndjson':
+        return iter_ndjson(attempts)
+    return iter_csv(attempts)
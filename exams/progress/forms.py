@@ -0,0 +1,32 @@
+from django import forms
+from django.forms import ValidationError
+from users.models import User
+
+from exams.models import Category, Exam, Sprint
+
+from .exports import EXPORT_FORMATS
+
+
+class ProgressExportForm(forms.Form):
+    exam = forms.ModelChoiceField(Exam.objects.all(), required=False)
+    sprint = forms.ModelChoiceField(Sprint.objects.all(), required=False)
+    category = forms.ModelChoiceField(Category.objects.all(), required=False)
+    user = forms.ModelChoiceField(
+        User.objects.all(), to_field_name='username', required=False
+    )
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    format = forms.ChoiceField(
+        choices=[(name, name) for name in EXPORT_FORMATS],
+        required=False
+    )
+
+    def clean(self):
+        date_from = self.cleaned_data.get('date_from')
+        date_to = self.cleaned_data.get('date_to')
+
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError('Начальная дата позже конечной')
+        if not self.cleaned_data.get('format'):
+            self.cleaned_data['format'] = EXPORT_FORMATS[0]
+        return self.cleaned_data
@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from exams.models import Question, Variant
+from progress.models import (Progress, ProgressResult, UserAnswer,
+                             UserVariant)
+
+
+class Command(BaseCommand):
+    help = ('Переносит выбранные варианты ответов из UserVariant '
+            'в битовые маски UserAnswer')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        compacted = 0
+        skipped = 0
+
+        while True:
+            answers = list(
+                UserAnswer.objects
+                .filter(id__gt=last_id, variant_ids=[])
+                .select_related('question')
+                .only('id', 'correct', 'question__type')
+                .order_by('id')[:batch_size]
+            )
+            if not answers:
+                break
+
+            rows = defaultdict(list)
+            for user_variant in (
+                UserVariant.objects
+                .filter(answer__in=answers)
+                .order_by('id')
+            ):
+                rows[user_variant.answer_id].append(user_variant)
+
+            for_update = [
+                answer for answer in answers
+                if self.compact(answer, rows[answer.id])
+            ]
+            skipped += len(answers) - len(for_update)
+
+            with transaction.atomic():
+                self.freeze_results(for_update)
+                UserAnswer.objects.bulk_update(for_update, [
+                    'variant_ids', 'selected_mask', 'correct_mask',
+                    'text_answer'
+                ])
+                UserVariant.objects.filter(answer__in=for_update).delete()
+
+            last_id = answers[-1].id
+            compacted += len(for_update)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Ответов перенесено: {compacted}, пропущено: {skipped}'
+        ))
+
+    @staticmethod
+    def freeze_results(answers: list) -> None:
+        """Variant texts live only in UserVariant, keep them in results."""
+        progress_ids = (
+            Progress.objects
+            .filter(
+                answers__in=answers, finished__isnull=False,
+                result__isnull=True
+            )
+            .values_list('id', flat=True)
+            .distinct()
+        )
+        for progress_id in progress_ids:
+            ProgressResult.objects.build(progress_id)
+
+    @staticmethod
+    def compact(answer: object, user_variants: list) -> bool:
+        text_answer = (
+            answer.question is not None
+            and answer.question.type == Question.TEXT_ANSWER
+        )
+        variants = [row for row in user_variants if row.variant_id]
+        typed = [row for row in user_variants if not row.variant_id]
+
+        if not variants or len(variants) > Variant.MAX_PER_QUESTION:
+            return False
+        if typed and not (
+            text_answer and len(typed) == 1
+            and typed[0].selected and not answer.correct
+        ):
+            return False
+
+        answer.variant_ids = [row.variant_id for row in variants]
+        answer.selected_mask = 0
+        answer.correct_mask = 0
+
+        for position, row in enumerate(variants):
+            if row.selected:
+                answer.selected_mask |= 1 << position
+            if row.correct:
+                answer.correct_mask |= 1 << position
+
+        if typed:
+            answer.text_answer = typed[0].variant_text
+        elif text_answer:
+            answer.text_answer = next(
+                (row.variant_text for row in variants if row.selected), None
+            )
+        return True
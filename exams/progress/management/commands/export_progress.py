@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from progress.exports import EXPORT_FORMATS, iter_export
+from progress.forms import ProgressExportForm
+
+
+class Command(BaseCommand):
+    help = 'Выгружает завершенные попытки пользователей с ответами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', help='id теста')
+        parser.add_argument('--sprint', help='id спринта')
+        parser.add_argument('--category', help='id категории')
+        parser.add_argument('--user', help='Имя пользователя')
+        parser.add_argument(
+            '--date-from', help='Дата завершения от (ГГГГ-ММ-ДД)'
+        )
+        parser.add_argument(
+            '--date-to', help='Дата завершения до (ГГГГ-ММ-ДД)'
+        )
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default=EXPORT_FORMATS[0]
+        )
+        parser.add_argument(
+            '--output', help='Файл для записи, по умолчанию stdout'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, **options):
+        form = ProgressExportForm({
+            field: options[field] for field in ProgressExportForm.base_fields
+            if options.get(field) is not None
+        })
+
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        chunks = iter_export(form.cleaned_data, options['chunk_size'])
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            f.writelines(chunks)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from progress.models import Progress
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает номера завершенных попыток пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, **options):
+        with transaction.atomic():
+            updated = Progress.objects.rebuild_attempts(options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Номера попыток обновлены: {updated}'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from progress.models import UserExamState
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает последние попытки пользователей по каждому тесту'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, **options):
+        with transaction.atomic():
+            UserExamState.objects.rebuild(options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS('Последние попытки пересчитаны'))
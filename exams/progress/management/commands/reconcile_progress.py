@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from progress.models import Progress
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает количество и процент верных ответов '
+            'в попытках пользователей')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        processed = 0
+
+        while True:
+            batch = list(
+                Progress.objects
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+
+            with transaction.atomic():
+                Progress.objects.recount(batch)
+
+            last_id = batch[-1]
+            processed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Попыток пересчитано: {processed}'
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from progress.purge import run_next_purge_job
+
+
+class Command(BaseCommand):
+    help = ('Выполняет поставленные в очередь задачи удаления прогресса '
+            'небольшими порциями')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, ожидая новые задачи'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='Пауза между проверками очереди в секундах'
+        )
+
+    def handle(self, **options):
+        while True:
+            try:
+                job = run_next_purge_job(options['batch_size'])
+            except Exception as error:
+                if not options['loop']:
+                    raise
+                self.stderr.write(f'Ошибка удаления прогресса: {error}')
+                time.sleep(options['interval'])
+                continue
+
+            if job is not None:
+                self.stdout.write(f'Задача {job.id} завершена: {job}')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Очередь удаления пуста'))
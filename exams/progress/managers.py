@@ -1,29 +1,19 @@
+from django.apps import apps
 from django.db.models import (Count, DateTimeField, ExpressionWrapper, F,
-                              IntegerField, Manager, Prefetch, Q, QuerySet)
-from django.db.models.expressions import Window
-from django.db.models.functions import RowNumber
-from django.db.models.functions.comparison import NullIf
+                              IntegerField, Manager, OuterRef, Prefetch, Q,
+                              QuerySet, Subquery, prefetch_related_objects)
+from django.db.models.functions.comparison import Coalesce, NullIf
+from django.utils import timezone
 
 
 class UserAnswerQuerySet(QuerySet):
 
-    def get_counters(self):
-        counters = (
-            self
-            .annotate(
-                corrected_count=Count('variants', filter=Q(
-                    variants__correct=True,
-                    variants__selected=True
-                )),
-                selected_count=Count('variants', filter=Q(
-                    variants__selected=True
-                )),
-                question_text=F('question__text'),
-                question_type=F('question__type'),
-                exam_show_correct=F('question__exam__show_correct'),
-            )
+    def with_question(self):
+        return self.annotate(
+            question_text=F('question__text'),
+            question_type=F('question__type'),
+            exam_show_correct=F('question__exam__show_correct'),
         )
-        return counters
 
 
 class UserAnswerManager(Manager):
@@ -31,25 +21,62 @@ class UserAnswerManager(Manager):
     def get_queryset(self):
         return UserAnswerQuerySet(self.model, using=self._db)
 
-    def get_counters(self) -> object:
-        return self.get_queryset().get_counters()
+    def with_question(self) -> object:
+        return self.get_queryset().with_question()
 
+    def get_variant_texts(self, answers: list) -> dict:
+        variant_model = (
+            self.model._meta.get_field('question').related_model
+            ._meta.get_field('variants').related_model
+        )
+        variant_ids = {
+            variant_id for answer in answers
+            for variant_id in answer.variant_ids
+        }
+        return dict(
+            variant_model.objects
+            .filter(id__in=variant_ids)
+            .values_list('id', 'text')
+        )
 
-class ProgressQuerySet(QuerySet):
+    def attach_variants(self, answers: list, texts: dict = None) -> list:
+        """Set variant_values and selection counters on each answer."""
+        compact = [answer for answer in answers if answer.compact]
+        legacy = [answer for answer in answers if not answer.compact]
 
-    def get_percentage(self):
-        percentage = (
-            self
-            .annotate(
-                correct_percentage=ExpressionWrapper(
-                    NullIf(Count('answers', filter=Q(
-                        answers__correct=True), distinct=True), 0) * 100
-                    / NullIf(F('answers_quantity'), 0),
-                    output_field=IntegerField()
-                )
+        if compact and texts is None:
+            texts = self.get_variant_texts(compact)
+
+        if legacy:
+            user_variant = self.model.variants.rel.related_model
+            prefetch_related_objects(legacy, Prefetch(
+                'variants',
+                queryset=user_variant.objects.order_by('-selected', 'id')
+            ))
+
+        for answer in answers:
+            if answer.compact:
+                answer.variant_values = answer.get_variant_values(texts)
+            else:
+                answer.variant_values = [
+                    {
+                        'variant_text': variant.variant_text,
+                        'selected': variant.selected,
+                        'correct': variant.correct
+                    }
+                    for variant in answer.variants.all()
+                ]
+            selected = [
+                value for value in answer.variant_values if value['selected']
+            ]
+            answer.selected_count = len(selected)
+            answer.corrected_count = len(
+                [value for value in selected if value['correct']]
             )
-        )
-        return percentage
+        return answers
+
+
+class ProgressQuerySet(QuerySet):
 
     def get_tracker_stats(self):
         tracker_stats = (
@@ -58,17 +85,12 @@ class ProgressQuerySet(QuerySet):
                 time_difference=ExpressionWrapper(
                     F('finished') - F('started'),
                     output_field=DateTimeField()
-                ),
-                attempt=Window(
-                    expression=RowNumber(),
-                    partition_by=[F('user'), F('exam')],
-                    order_by=[F('finished')]
                 )
             )
         )
         return tracker_stats
 
-    def get_details(self, answers: object, variants: object) -> object:
+    def get_details(self, answers: object) -> object:
         details = (
             self
             .select_related('user', 'exam', 'exam__category')
@@ -77,25 +99,14 @@ class ProgressQuerySet(QuerySet):
                     'answers', queryset=answers.objects
                     .filter(progress=F('progress'))
                     .defer('question', 'date')
-                    .get_counters()
-                    .order_by('date')
-                ),
-                Prefetch(
-                    'answers__variants', queryset=variants.objects
-                    .filter(answer=F('answer'))
-                    .defer('variant')
-                    .order_by('-selected', '?')
+                    .with_question()
+                    .order_by('date', 'id')
                 ))
             .annotate(
                 questions_count=Count(
                     'exam__questions', distinct=True, filter=Q(
                         exam__questions__visibility=True,
                         exam__questions__active=True
-                    )),
-
-                correct_count=Count(
-                    'answers', distinct=True, filter=Q(
-                        answers__correct=True
                     ))
             )
         )
@@ -107,11 +118,220 @@ class ProgressManager(Manager):
     def get_queryset(self):
         return ProgressQuerySet(self.model, using=self._db)
 
-    def get_percentage(self):
-        return self.get_queryset().get_percentage()
-
     def get_tracker_stats(self):
         return self.get_queryset().tracker_stats()
 
-    def get_details(self, answers: object, variants: object) -> object:
-        return self.get_queryset().get_details()
+    def get_correct_percentage(self, correct: object) -> object:
+        return Coalesce(correct * 100 / NullIf(F('answers_quantity'), 0), 0)
+
+    def register_answers(self, progress_id: int, correct_count: int) -> None:
+        correct = F('correct_count') + correct_count
+        self.filter(id=progress_id).update(
+            correct_count=correct,
+            correct_percentage=self.get_correct_percentage(correct)
+        )
+
+    def get_next_attempt(self, progress: object) -> int:
+        previous = (
+            self
+            .filter(
+                user_id=progress.user_id,
+                exam_id=progress.exam_id,
+                finished__isnull=False
+            )
+            .exclude(id=progress.id)
+            .count()
+        )
+        return previous + 1
+
+    def rebuild_attempts(self, batch_size: int = 1000) -> int:
+        progression = (
+            self
+            .filter(finished__isnull=False)
+            .order_by('user_id', 'exam_id', 'finished', 'id')
+            .only('id', 'user_id', 'exam_id', 'attempt')
+            .iterator(chunk_size=batch_size)
+        )
+        current = None
+        attempt = 0
+        updated = 0
+        for_update = []
+
+        for progress in progression:
+            key = (progress.user_id, progress.exam_id)
+            attempt = attempt + 1 if key == current else 1
+            current = key
+
+            if progress.attempt != attempt:
+                progress.attempt = attempt
+                for_update.append(progress)
+
+            if len(for_update) >= batch_size:
+                self.bulk_update(for_update, ['attempt'])
+                updated += len(for_update)
+                for_update = []
+
+        self.bulk_update(for_update, ['attempt'])
+        return updated + len(for_update)
+
+    def recount(self, progress_ids: list) -> None:
+        answers_model = self.model._meta.get_field('answers').related_model
+        correct = Coalesce(Subquery(
+            answers_model.objects
+            .filter(progress=OuterRef('pk'), correct=True)
+            .values('progress')
+            .annotate(count=Count('id'))
+            .values('count'),
+            output_field=IntegerField()
+        ), 0)
+        progression = self.filter(id__in=progress_ids)
+        progression.update(correct_count=correct)
+        progression.update(
+            correct_percentage=self.get_correct_percentage(F('correct_count'))
+        )
+
+    def get_details(self, answers: object) -> object:
+        return self.get_queryset().get_details(answers)
+
+
+class UserExamStateManager(Manager):
+
+    def state_values(self, progress: object) -> dict:
+        return {
+            'progress_id': progress.id,
+            'stage': progress.stage,
+            'answers_quantity': progress.answers_quantity,
+            'correct_count': progress.correct_count,
+            'started': progress.started,
+            'finished': progress.finished,
+            'passed': progress.passed
+        }
+
+    def sync(self, progress_id: int) -> object:
+        progress_model = self.model._meta.get_field('progress').related_model
+        progress = progress_model.objects.get(id=progress_id)
+        state, _ = self.update_or_create(
+            user_id=progress.user_id,
+            exam_id=progress.exam_id,
+            defaults=self.state_values(progress)
+        )
+        return state
+
+    def rebuild(self, batch_size: int = 1000) -> None:
+        progress_model = self.model._meta.get_field('progress').related_model
+        latest = (
+            progress_model.objects
+            .order_by('user_id', 'exam_id', '-started')
+            .distinct('user_id', 'exam_id')
+            .values('id')
+        )
+        progression = (
+            progress_model.objects
+            .filter(id__in=latest)
+            .iterator(chunk_size=batch_size)
+        )
+        self.all().delete()
+        for_create = []
+
+        for progress in progression:
+            for_create.append(self.model(
+                user_id=progress.user_id,
+                exam_id=progress.exam_id,
+                **self.state_values(progress)
+            ))
+            if len(for_create) >= batch_size:
+                self.bulk_create(for_create)
+                for_create = []
+
+        self.bulk_create(for_create)
+
+
+class ProgressResultManager(Manager):
+
+    def answer_values(self, answer: object) -> dict:
+        return {
+            'question_text': answer.question_text,
+            'question_type': answer.question_type,
+            'exam_show_correct': answer.exam_show_correct,
+            'correct': answer.correct,
+            'no_answers': answer.no_answers,
+            'selected_count': answer.selected_count,
+            'corrected_count': answer.corrected_count,
+            'variants': answer.variant_values
+        }
+
+    def build(self, progress_id: int) -> object:
+        progress_model = self.model._meta.get_field('progress').related_model
+        answer_model = progress_model._meta.get_field('answers').related_model
+        progress = (
+            progress_model.objects
+            .filter(id=progress_id)
+            .get_details(answers=answer_model)
+            .first()
+        )
+        answers = answer_model.objects.attach_variants(
+            list(progress.answers.all())
+        )
+        result, _ = self.update_or_create(
+            progress_id=progress_id,
+            defaults={'answers': [
+                self.answer_values(answer) for answer in answers
+            ]}
+        )
+        return result
+
+
+class PurgeJobManager(Manager):
+
+    def enqueue(self, description: str, exam_ids: list = (),
+                sprint_ids: list = (), author: object = None) -> object:
+        progress_model = apps.get_model('progress', 'Progress')
+        user_sprint_model = apps.get_model('progress', 'UserSprint')
+        total = 0
+        user_ids = []
+
+        if exam_ids:
+            progression = progress_model.objects.filter(exam_id__in=exam_ids)
+            total += progression.count()
+            user_ids = list(
+                progression
+                .order_by('user_id')
+                .values_list('user_id', flat=True)
+                .distinct()
+            )
+        if sprint_ids:
+            total += user_sprint_model.objects.filter(
+                sprint_id__in=sprint_ids
+            ).count()
+        return self.create(
+            description=description[:500],
+            exam_ids=list(exam_ids),
+            sprint_ids=list(sprint_ids),
+            user_ids=user_ids,
+            total=total,
+            author=author
+        )
+
+    def claim(self) -> object or None:
+        """Oldest pending job or a running one whose worker stopped."""
+        now = timezone.now()
+        expired = (
+            Q(heartbeat__lt=now - self.model.LEASE_TIMEOUT)
+            | Q(heartbeat__isnull=True)
+        )
+        job = (
+            self
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=self.model.PENDING)
+                | Q(expired, status=self.model.RUNNING)
+            )
+            .order_by('id')
+            .first()
+        )
+        if job is not None:
+            job.status = self.model.RUNNING
+            job.started = job.started or now
+            job.heartbeat = now
+            job.save(update_fields=('status', 'started', 'heartbeat'))
+        return job
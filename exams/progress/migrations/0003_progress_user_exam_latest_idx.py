@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['user', 'exam', '-started'], name='progress_user_exam_latest_idx'),
+        ),
+    ]
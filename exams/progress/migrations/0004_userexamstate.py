@@ -0,0 +1,85 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def fill_exam_states(apps, schema_editor):
+    Progress = apps.get_model('progress', 'Progress')
+    UserExamState = apps.get_model('progress', 'UserExamState')
+    progression = (
+        Progress.objects
+        .annotate(correct_count=Count(
+            'answers', filter=Q(answers__correct=True)
+        ))
+        .order_by('user_id', 'exam_id', '-started', '-id')
+        .values_list(
+            'id', 'user_id', 'exam_id', 'stage', 'answers_quantity',
+            'correct_count', 'started', 'finished', 'passed'
+        )
+        .iterator(chunk_size=1000)
+    )
+    current = None
+    for_create = []
+
+    for progress_id, user_id, exam_id, *values in progression:
+        if (user_id, exam_id) == current:
+            continue
+        current = (user_id, exam_id)
+        stage, answers_quantity, correct_count, started, finished, passed = (
+            values
+        )
+        for_create.append(UserExamState(
+            progress_id=progress_id,
+            user_id=user_id,
+            exam_id=exam_id,
+            stage=stage,
+            answers_quantity=answers_quantity,
+            correct_count=correct_count,
+            started=started,
+            finished=finished,
+            passed=passed
+        ))
+        if len(for_create) >= 1000:
+            UserExamState.objects.bulk_create(for_create)
+            for_create = []
+
+    UserExamState.objects.bulk_create(for_create)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exams', '0002_initial'),
+        ('progress', '0003_progress_user_exam_latest_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserExamState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.PositiveIntegerField(default=1, verbose_name='Этап')),
+                ('answers_quantity', models.PositiveIntegerField(default=0, verbose_name='Ответов')),
+                ('correct_count', models.PositiveIntegerField(default=0, verbose_name='Верных ответов')),
+                ('started', models.DateTimeField(verbose_name='Дата начала')),
+                ('finished', models.DateTimeField(null=True, verbose_name='Дата завершения')),
+                ('passed', models.BooleanField(null=True, verbose_name='Зачтено')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_states', to='exams.exam', verbose_name='Тестирование')),
+                ('progress', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='state', to='progress.progress', verbose_name='Последний прогресс')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_states', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Последняя попытка пользователя',
+                'verbose_name_plural': 'Последние попытки пользователей',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='userexamstate',
+            constraint=models.UniqueConstraint(fields=('user', 'exam'), name='unique_user_exam_state'),
+        ),
+        migrations.RunPython(fill_exam_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0004_userexamstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progress',
+            name='questions_queue',
+            field=models.JSONField(default=list, editable=False, verbose_name='Очередь вопросов'),
+        ),
+    ]
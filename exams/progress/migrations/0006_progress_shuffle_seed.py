@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:54
+
+from django.db import migrations, models
+import progress.models
+
+
+def fill_shuffle_seed(apps, schema_editor):
+    Progress = apps.get_model('progress', 'Progress')
+    for_update = []
+
+    for row in Progress.objects.only('id').iterator(chunk_size=1000):
+        row.shuffle_seed = progress.models.get_shuffle_seed()
+        for_update.append(row)
+        if len(for_update) >= 1000:
+            Progress.objects.bulk_update(for_update, ['shuffle_seed'])
+            for_update = []
+
+    Progress.objects.bulk_update(for_update, ['shuffle_seed'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0005_progress_questions_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progress',
+            name='shuffle_seed',
+            field=models.PositiveIntegerField(default=progress.models.get_shuffle_seed, editable=False, verbose_name='Зерно перемешивания'),
+        ),
+        migrations.RunPython(fill_shuffle_seed, migrations.RunPython.noop),
+    ]
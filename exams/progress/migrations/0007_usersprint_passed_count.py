@@ -0,0 +1,43 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:55
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_passed_count(apps, schema_editor):
+    Progress = apps.get_model('progress', 'Progress')
+    UserSprint = apps.get_model('progress', 'UserSprint')
+    passed = (
+        Progress.objects
+        .filter(passed=True, exam__sprint__isnull=False)
+        .values_list('user_id', 'exam__sprint_id')
+        .annotate(passed_count=Count('exam', distinct=True))
+        .order_by()
+    )
+    counts = {
+        (user_id, sprint_id): count for user_id, sprint_id, count in passed
+    }
+    user_sprints = list(UserSprint.objects.all())
+
+    for user_sprint in user_sprints:
+        user_sprint.passed_count = counts.get(
+            (user_sprint.user_id, user_sprint.sprint_id), 0
+        )
+
+    UserSprint.objects.bulk_update(user_sprints, ['passed_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0006_progress_shuffle_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersprint',
+            name='passed_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Пройдено тестов'),
+        ),
+        migrations.RunPython(fill_passed_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0007_usersprint_passed_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progress',
+            name='correct_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Верных ответов'),
+        ),
+        migrations.AddField(
+            model_name='progress',
+            name='correct_percentage',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Процент верных ответов'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0008_progress_correct_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressResult',
+            fields=[
+                ('progress', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='result', serialize=False, to='progress.progress', verbose_name='Прогресс')),
+                ('answers', models.JSONField(default=list, verbose_name='Ответы')),
+                ('created', models.DateTimeField(auto_now=True, verbose_name='Дата формирования')),
+            ],
+            options={
+                'verbose_name': 'Результат попытки',
+                'verbose_name_plural': 'Результаты попыток',
+            },
+        ),
+    ]
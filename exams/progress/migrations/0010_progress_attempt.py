@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0009_progressresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progress',
+            name='attempt',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Номер попытки'),
+        ),
+    ]
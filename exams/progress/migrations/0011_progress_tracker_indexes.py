@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0010_progress_attempt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(condition=models.Q(('finished__isnull', False)), fields=['-finished', '-id'], name='progress_finished_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(condition=models.Q(('finished__isnull', False)), fields=['exam', '-finished', '-id'], name='progress_exam_finished_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(condition=models.Q(('finished__isnull', False)), fields=['user', '-finished', '-id'], name='progress_user_finished_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0011_progress_tracker_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useranswer',
+            name='correct_mask',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Верные варианты'),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='selected_mask',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Выбранные варианты'),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='text_answer',
+            field=models.TextField(blank=True, null=True, verbose_name='Текстовый ответ'),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='variant_ids',
+            field=models.JSONField(default=list, verbose_name='Порядок вариантов ответа'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('progress', '0012_useranswer_masks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(max_length=500, verbose_name='Описание')),
+                ('exam_ids', models.JSONField(default=list, verbose_name='Тесты')),
+                ('sprint_ids', models.JSONField(default=list, verbose_name='Спринты')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Записей к удалению')),
+                ('deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено записей')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Дата начала')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purge_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Удаление прогресса',
+                'verbose_name_plural': 'Удаление прогресса',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0013_purgejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purgejob',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+def fill_user_ids(apps, schema_editor):
+    Progress = apps.get_model('progress', 'Progress')
+    PurgeJob = apps.get_model('progress', 'PurgeJob')
+
+    for job in PurgeJob.objects.filter(status__in=('pending', 'running')):
+        job.user_ids = list(
+            Progress.objects
+            .filter(exam_id__in=job.exam_ids)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)
+            .distinct()
+        )
+        job.save(update_fields=['user_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0014_purgejob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purgejob',
+            name='user_ids',
+            field=models.JSONField(default=list, verbose_name='Пользователи'),
+        ),
+        migrations.RunPython(fill_user_ids, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+from datetime import timedelta
+from random import Random, getrandbits
 from uuid import uuid4
 
 from django.db import models
@@ -5,10 +7,15 @@ from django.urls import reverse
 from users.models import User
 
 from exams.models import Exam, Question, Sprint, Variant
+from exams.snapshots import get_exam_snapshot
 
 from . import managers
 
 
+def get_shuffle_seed():
+    return getrandbits(31)
+
+
 class UserSprint(models.Model):
     user = models.ForeignKey(
         User,
@@ -30,6 +37,11 @@ class UserSprint(models.Model):
         verbose_name='Дата завершения',
         null=True
     )
+    passed_count = models.PositiveIntegerField(
+        verbose_name='Пройдено тестов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пройденный спринт'
@@ -62,6 +74,16 @@ class Progress(models.Model):
         verbose_name='Ответов',
         default=0
     )
+    correct_count = models.PositiveIntegerField(
+        verbose_name='Верных ответов',
+        default=0,
+        editable=False
+    )
+    correct_percentage = models.PositiveIntegerField(
+        verbose_name='Процент верных ответов',
+        default=0,
+        editable=False
+    )
     started = models.DateTimeField(
         verbose_name='Дата начала',
         auto_now_add=True
@@ -74,6 +96,11 @@ class Progress(models.Model):
         verbose_name='Зачтено',
         null=True
     )
+    attempt = models.PositiveIntegerField(
+        verbose_name='Номер попытки',
+        null=True,
+        editable=False
+    )
     guest_key = models.CharField(
         verbose_name='Гостевой ключ',
         null=True,
@@ -81,12 +108,43 @@ class Progress(models.Model):
         editable=False,
         max_length=100
     )
+    questions_queue = models.JSONField(
+        verbose_name='Очередь вопросов',
+        default=list,
+        editable=False
+    )
+    shuffle_seed = models.PositiveIntegerField(
+        verbose_name='Зерно перемешивания',
+        default=get_shuffle_seed,
+        editable=False
+    )
 
     objects = managers.ProgressManager()
 
     class Meta:
         verbose_name = 'Прогресс пользователя'
         verbose_name_plural = 'Прогресс пользователей'
+        indexes = [
+            models.Index(
+                fields=['user', 'exam', '-started'],
+                name='progress_user_exam_latest_idx'
+            ),
+            models.Index(
+                fields=['-finished', '-id'],
+                name='progress_finished_idx',
+                condition=models.Q(finished__isnull=False)
+            ),
+            models.Index(
+                fields=['exam', '-finished', '-id'],
+                name='progress_exam_finished_idx',
+                condition=models.Q(finished__isnull=False)
+            ),
+            models.Index(
+                fields=['user', '-finished', '-id'],
+                name='progress_user_finished_idx',
+                condition=models.Q(finished__isnull=False)
+            )
+        ]
 
     def __str__(self):
         return f'{self.user} in exam: {self.exam_id} (stage: {self.stage})'
@@ -94,8 +152,18 @@ class Progress(models.Model):
     def save(self, *args, **kwargs):
         if self._state.adding:
             self.guest_key = str(uuid4())
+            if not self.questions_queue:
+                self.freeze_questions_queue()
         super().save(*args, **kwargs)
 
+    def freeze_questions_queue(self):
+        self.questions_queue = get_exam_snapshot(self.exam).question_ids
+
+    def shuffled(self, items: object, salt: object) -> list:
+        items = list(items)
+        Random(f'{self.shuffle_seed}-{salt}').shuffle(items)
+        return items
+
     def get_absolute_url(self):
         return reverse('progress:progress_detail', kwargs={'pk': str(self.pk)})
 
@@ -122,6 +190,23 @@ class UserAnswer(models.Model):
         verbose_name='Без ответов',
         null=True,
     )
+    variant_ids = models.JSONField(
+        verbose_name='Порядок вариантов ответа',
+        default=list
+    )
+    selected_mask = models.PositiveBigIntegerField(
+        verbose_name='Выбранные варианты',
+        default=0
+    )
+    correct_mask = models.PositiveBigIntegerField(
+        verbose_name='Верные варианты',
+        default=0
+    )
+    text_answer = models.TextField(
+        verbose_name='Текстовый ответ',
+        null=True,
+        blank=True
+    )
     date = models.DateTimeField(
         verbose_name='Дата ответа',
         auto_now_add=True
@@ -134,6 +219,30 @@ class UserAnswer(models.Model):
         verbose_name_plural = 'Ответы пользователей'
         ordering = ['date']
 
+    @property
+    def compact(self):
+        return bool(self.variant_ids)
+
+    def get_variant_values(self, texts: dict) -> list:
+        values = [
+            {
+                'variant_text': texts.get(variant_id),
+                'selected': bool(self.selected_mask >> position & 1),
+                'correct': bool(self.correct_mask >> position & 1)
+            }
+            for position, variant_id in enumerate(self.variant_ids)
+            if variant_id in texts
+        ]
+        values.sort(key=lambda value: not value['selected'])
+
+        if self.text_answer is not None and not self.correct:
+            values.insert(0, {
+                'variant_text': self.text_answer,
+                'selected': True,
+                'correct': False
+            })
+        return values
+
 
 class UserVariant(models.Model):
     answer = models.ForeignKey(
@@ -166,3 +275,183 @@ class UserVariant(models.Model):
         verbose_name = 'Вариант ответа пользователя'
         verbose_name_plural = 'Варианты ответов пользователей'
         ordering = ['-correct', '-selected']
+
+
+class UserExamState(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        related_name='exam_states',
+        on_delete=models.CASCADE
+    )
+    exam = models.ForeignKey(
+        Exam,
+        verbose_name='Тестирование',
+        related_name='user_states',
+        on_delete=models.CASCADE
+    )
+    progress = models.OneToOneField(
+        Progress,
+        verbose_name='Последний прогресс',
+        related_name='state',
+        on_delete=models.CASCADE
+    )
+    stage = models.PositiveIntegerField(
+        verbose_name='Этап',
+        default=1
+    )
+    answers_quantity = models.PositiveIntegerField(
+        verbose_name='Ответов',
+        default=0
+    )
+    correct_count = models.PositiveIntegerField(
+        verbose_name='Верных ответов',
+        default=0
+    )
+    started = models.DateTimeField(
+        verbose_name='Дата начала'
+    )
+    finished = models.DateTimeField(
+        verbose_name='Дата завершения',
+        null=True
+    )
+    passed = models.BooleanField(
+        verbose_name='Зачтено',
+        null=True
+    )
+
+    objects = managers.UserExamStateManager()
+
+    class Meta:
+        verbose_name = 'Последняя попытка пользователя'
+        verbose_name_plural = 'Последние попытки пользователей'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'exam'],
+                name='unique_user_exam_state'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} in exam: {self.exam_id} ({self.progress_id})'
+
+
+class ProgressResult(models.Model):
+    progress = models.OneToOneField(
+        Progress,
+        verbose_name='Прогресс',
+        related_name='result',
+        primary_key=True,
+        on_delete=models.CASCADE
+    )
+    answers = models.JSONField(
+        verbose_name='Ответы',
+        default=list
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата формирования',
+        auto_now=True
+    )
+
+    objects = managers.ProgressResultManager()
+
+    class Meta:
+        verbose_name = 'Результат попытки'
+        verbose_name_plural = 'Результаты попыток'
+
+    def __str__(self):
+        return f'{self.progress_id}'
+
+
+class PurgeJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+        (FAILED, 'Ошибка')
+    )
+    LEASE_TIMEOUT = timedelta(minutes=10)
+
+    description = models.CharField(
+        verbose_name='Описание',
+        max_length=500
+    )
+    exam_ids = models.JSONField(
+        verbose_name='Тесты',
+        default=list
+    )
+    sprint_ids = models.JSONField(
+        verbose_name='Спринты',
+        default=list
+    )
+    user_ids = models.JSONField(
+        verbose_name='Пользователи',
+        default=list
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        choices=STATUSES,
+        max_length=16,
+        default=PENDING
+    )
+    total = models.PositiveIntegerField(
+        verbose_name='Записей к удалению',
+        default=0
+    )
+    deleted = models.PositiveIntegerField(
+        verbose_name='Удалено записей',
+        default=0
+    )
+    error = models.TextField(
+        verbose_name='Ошибка',
+        null=True,
+        blank=True
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        related_name='purge_jobs',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата постановки в очередь',
+        auto_now_add=True
+    )
+    started = models.DateTimeField(
+        verbose_name='Дата начала',
+        null=True,
+        blank=True
+    )
+    heartbeat = models.DateTimeField(
+        verbose_name='Последняя активность',
+        null=True,
+        blank=True
+    )
+    finished = models.DateTimeField(
+        verbose_name='Дата завершения',
+        null=True,
+        blank=True
+    )
+
+    objects = managers.PurgeJobManager()
+
+    class Meta:
+        verbose_name = 'Удаление прогресса'
+        verbose_name_plural = 'Удаление прогресса'
+        ordering = ['-created']
+
+    def __str__(self):
+        return f'{self.description}'
+
+    @property
+    def percentage(self):
+        if not self.total:
+            return 100 if self.status == self.DONE else 0
+        return min(self.deleted * 100 // self.total, 100)
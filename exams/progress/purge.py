@@ -0,0 +1,103 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from exams.models import Exam, QuestionStats
+from exams.utils import update_exam_counters, update_user_sprint_counters
+from users.models import UserStats
+
+from .models import (Progress, ProgressResult, PurgeJob, UserAnswer,
+                     UserExamState, UserSprint, UserVariant)
+
+
+def raw_delete(queryset: object) -> int:
+    """DELETE ... WHERE without the collector, cascades go first."""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_progress(progress_ids: list) -> int:
+    with transaction.atomic():
+        raw_delete(UserVariant.objects.filter(
+            answer__progress_id__in=progress_ids
+        ))
+        raw_delete(UserAnswer.objects.filter(progress_id__in=progress_ids))
+        raw_delete(ProgressResult.objects.filter(
+            progress_id__in=progress_ids
+        ))
+        raw_delete(UserExamState.objects.filter(
+            progress_id__in=progress_ids
+        ))
+        return raw_delete(Progress.objects.filter(id__in=progress_ids))
+
+
+def delete_user_sprints(user_sprint_ids: list) -> int:
+    return raw_delete(UserSprint.objects.filter(id__in=user_sprint_ids))
+
+
+def iter_batches(queryset: object, batch_size: int) -> object:
+    """Ids of the rows left, the query is repeated after every delete."""
+    while True:
+        batch = list(
+            queryset.order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+
+
+def renew_heartbeat(job: PurgeJob, **update) -> None:
+    PurgeJob.objects.filter(id=job.id).update(
+        heartbeat=timezone.now(), **update
+    )
+
+
+def run_purge_job(job: PurgeJob, batch_size: int = 500) -> None:
+    steps = (
+        (Progress.objects.filter(exam_id__in=job.exam_ids), delete_progress),
+        (UserSprint.objects.filter(sprint_id__in=job.sprint_ids),
+         delete_user_sprints)
+    )
+    try:
+        for queryset, delete in steps:
+            for batch in iter_batches(queryset, batch_size):
+                deleted = delete(batch)
+                renew_heartbeat(job, deleted=F('deleted') + deleted)
+
+        with transaction.atomic():
+            update_exam_counters(job.exam_ids, fields=(
+                'users_count', 'answers_count', 'correct_answers_count'
+            ))
+            update_user_sprint_counters(
+                Exam.objects
+                .filter(id__in=job.exam_ids, sprint__isnull=False)
+                .values('sprint')
+            )
+            # every answer to the questions of these exams is gone
+            QuestionStats.objects.filter(
+                question__exam_id__in=job.exam_ids
+            ).delete()
+        renew_heartbeat(job)
+
+        for start in range(0, len(job.user_ids), batch_size):
+            UserStats.objects.refresh_users(
+                job.user_ids[start:start + batch_size]
+            )
+            renew_heartbeat(job)
+    except Exception as error:
+        PurgeJob.objects.filter(id=job.id).update(
+            status=PurgeJob.FAILED, error=str(error),
+            finished=timezone.now()
+        )
+        raise
+
+    PurgeJob.objects.filter(id=job.id).update(
+        status=PurgeJob.DONE, finished=timezone.now()
+    )
+
+
+def run_next_purge_job(batch_size: int = 500) -> PurgeJob or None:
+    with transaction.atomic():
+        job = PurgeJob.objects.claim()
+    if job is not None:
+        run_purge_job(job, batch_size)
+    return job
@@ -0,0 +1,35 @@
+from core.testing import ChangelistQueriesMixin
+from django.test import TestCase
+
+from exams.models import Category, Exam, Sprint
+from progress.models import Progress, PurgeJob, UserSprint
+from users.models import User
+
+
+class ChangelistQueriesTest(ChangelistQueriesMixin, TestCase):
+
+    def add_rows(self, start, count):
+        for number in range(start, start + count):
+            user = User.objects.create_user(
+                username=f'user{number}', email=f'user{number}@example.com'
+            )
+            sprint = Sprint.objects.create(title=f'Спринт {number}')
+            exam = Exam.objects.create(
+                title=f'Тест {number}', description='Описание',
+                category=Category.objects.create(title=f'Категория {number}'),
+                sprint=sprint
+            )
+            Progress.objects.create(user=user, exam=exam)
+            UserSprint.objects.create(user=user, sprint=sprint)
+            PurgeJob.objects.create(
+                description=f'Тест {number}', exam_ids=[exam.id], author=user
+            )
+
+    def test_progress_changelist(self):
+        self.assert_changelist_queries(Progress)
+
+    def test_user_sprint_changelist(self):
+        self.assert_changelist_queries(UserSprint)
+
+    def test_purge_job_changelist(self):
+        self.assert_changelist_queries(PurgeJob)
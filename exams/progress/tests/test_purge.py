@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from exams.models import Category, Exam, Question, QuestionStats, Variant
+from progress.models import Progress, PurgeJob
+from progress.purge import delete_progress, run_next_purge_job
+from users.models import User, UserStats
+
+
+class PurgeJobTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='student', email='student@example.com', password='x'
+        )
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(title='Категория')
+            self.exam = Exam.objects.create(
+                title='Тест', description='Описание', category=category,
+                visibility=True
+            )
+            self.question = Question.objects.create(
+                exam=self.exam, text='Вопрос', type=Question.ONE_CORRECT,
+                visibility=True
+            )
+            self.variant = Variant.objects.create(
+                question=self.question, text='Верно', correct=True
+            )
+            Variant.objects.create(
+                question=self.question, text='Неверно', correct=False
+            )
+
+    def finish_exam(self):
+        url = reverse(
+            'exams:exam_process', kwargs={'slug': self.exam.slug, 'pk': 1}
+        )
+        self.client.get(url)
+        self.client.post(url, {'result': str(self.variant.id)})
+
+    def test_purge_refreshes_stats(self):
+        self.finish_exam()
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(stats.exams_count, 1)
+        self.assertTrue(
+            QuestionStats.objects.filter(question=self.question).exists()
+        )
+
+        job = PurgeJob.objects.enqueue('Тест', exam_ids=[self.exam.id])
+        self.assertEqual(job.total, 1)
+        run_next_purge_job()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PurgeJob.DONE)
+        self.assertFalse(Progress.objects.filter(exam=self.exam).exists())
+        self.assertFalse(
+            QuestionStats.objects.filter(question=self.question).exists()
+        )
+        stats.refresh_from_db()
+        self.assertEqual(
+            (stats.exams_count, stats.passed_count, stats.points), (0, 0, 0)
+        )
+        self.exam.refresh_from_db()
+        self.assertEqual(self.exam.users_count, 0)
+
+    def test_running_job_is_claimed_after_lease(self):
+        job = PurgeJob.objects.enqueue('Тест', exam_ids=[self.exam.id])
+        self.assertEqual(PurgeJob.objects.claim(), job)
+        self.assertIsNone(PurgeJob.objects.claim())
+
+        PurgeJob.objects.filter(id=job.id).update(
+            heartbeat=timezone.now() - PurgeJob.LEASE_TIMEOUT
+        )
+        self.assertEqual(PurgeJob.objects.claim(), job)
+
+    def test_resumed_job_refreshes_users_deleted_before(self):
+        self.finish_exam()
+        job = PurgeJob.objects.enqueue('Тест', exam_ids=[self.exam.id])
+        self.assertEqual(job.user_ids, [self.user.id])
+
+        delete_progress(list(
+            Progress.objects
+            .filter(exam=self.exam)
+            .values_list('id', flat=True)
+        ))
+        run_next_purge_job()
+
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.exams_count, stats.points), (0, 0))
@@ -19,5 +19,10 @@ urlpatterns = [
         'progress/tracker/',
         views.ProgressTrackerView.as_view(),
         name='progress_tracker'
+    ),
+    path(
+        'progress/export/',
+        views.ProgressExportView.as_view(),
+        name='progress_export'
     )
 ]
@@ -1,11 +1,17 @@
+from core.pagination import KeysetPaginationMixin
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.cache import cache
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.views.generic import DetailView, ListView
+from django.views.generic import DetailView, ListView, View
 from users.models import User
 
 from exams.models import Exam
 from exams.utils import get_next_exam_in_sprint
 
-from .models import Progress, UserAnswer, UserVariant
+from .exports import EXPORT_CONTENT_TYPES, iter_export
+from .forms import ProgressExportForm
+from .models import Progress, ProgressResult
 
 
 class ProgressDetailView(DetailView):
@@ -16,15 +22,22 @@ class ProgressDetailView(DetailView):
 
     def get_object(self):
         progress_id = self.kwargs.get('pk')
-        progress = (
+        progress = get_object_or_404(
             Progress.objects
             .filter(id=progress_id)
-            .select_related('exam__sprint')
-            .get_tracker_stats()
-            .get_details(variants=UserVariant, answers=UserAnswer)
-            .get_percentage()
+            .select_related('user', 'exam__category', 'exam__sprint', 'result')
+            .defer('questions_queue')
         )
-        return get_object_or_404(progress)
+
+        if progress.finished:
+            progress.time_difference = progress.finished - progress.started
+        return progress
+
+    def get_result(self):
+        try:
+            return self.object.result
+        except ProgressResult.DoesNotExist:
+            return ProgressResult.objects.build(self.object.id)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -32,6 +45,9 @@ class ProgressDetailView(DetailView):
         uuid = self.request.GET.get('uuid')
         context['access_allowed'] = True
 
+        if self.object.finished:
+            context['result'] = self.get_result()
+
         if self.object.user == user and self.object.exam.sprint:
             previously_passed = (
                 Progress.objects
@@ -91,46 +107,83 @@ class ProgressListView(ListView):
         return queryset
 
 
-class ProgressTrackerView(ListView):
+class ProgressTrackerView(KeysetPaginationMixin, ListView):
     model = Progress
     template_name = 'progress/progress_tracker.html'
     context_object_name = 'tracker'
     paginate_by = 20
+    keyset_ordering = ('-finished', '-id')
+    count_timeout = 60 * 5
 
-    def get_queryset(self):
+    def get_filters(self):
         user = self.request.GET.get('user')
         exam = self.request.GET.get('exam')
+        self.filtered_user = None
+        self.filtered_exam = None
+        filter_data = {'finished__isnull': False}
+
+        if exam:
+            self.filtered_exam = get_object_or_404(Exam, id=exam)
+            filter_data['exam'] = self.filtered_exam
+
+        if user:
+            self.filtered_user = get_object_or_404(User, username=user)
+            filter_data['user'] = self.filtered_user
+
+        return filter_data
+
+    def get_total_count(self):
+        key = 'tracker-count:{}:{}'.format(
+            getattr(self.filtered_exam, 'id', ''),
+            getattr(self.filtered_user, 'id', '')
+        )
+        return cache.get_or_set(
+            key, Progress.objects.filter(**self.filters).count,
+            self.count_timeout
+        )
+
+    def get_queryset(self):
+        self.filters = self.get_filters()
         queryset = (
             Progress.objects
-            .filter(finished__isnull=False)
+            .filter(**self.filters)
             .select_related('exam', 'user', 'exam__category', 'exam__sprint')
-            .only('finished', 'passed', 'user__username', 'exam__title',
+            .only('finished', 'passed', 'attempt', 'correct_percentage',
+                  'user__username', 'exam__title',
                   'exam__slug', 'exam__category__title',
                   'exam__category__slug', 'exam__sprint__title',
                   'exam__sprint__slug')
-            .get_percentage()
             .get_tracker_stats()
-            .order_by('-finished')
         )
-
-        if exam:
-            queryset = queryset.filter(exam_id=exam)
-
-        if user:
-            queryset = queryset.filter(user__username=user)
-
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.GET.get('user')
-        exam = self.request.GET.get('exam')
+        context.update({
+            'filtered_user': self.filtered_user,
+            'filtered_exam': self.filtered_exam,
+            'total_count': self.get_total_count()
+        })
+        return context
 
-        if exam:
-            exam = get_object_or_404(Exam, id=exam)
 
-        if user:
-            user = get_object_or_404(User, username=user)
+class ProgressExportView(UserPassesTestMixin, View):
 
-        context.update({'filtered_user': user, 'filtered_exam': exam})
-        return context
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        form = ProgressExportForm(request.GET)
+
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+
+        export_format = form.cleaned_data['format']
+        response = StreamingHttpResponse(
+            iter_export(form.cleaned_data),
+            content_type=EXPORT_CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="progress.{export_format}"'
+        )
+        return response
@@ -2,13 +2,16 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from progress.models import Progress, UserSprint
 
-from .models import User
+from .models import User, UserStats
 
 
 @admin.action(description='Удалить связанный прогресс')
 def delete_progress(modeladmin, request, queryset):
     Progress.objects.filter(user__in=queryset).delete()
     UserSprint.objects.filter(user__in=queryset).delete()
+    UserStats.objects.filter(user__in=queryset).update(
+        exams_count=0, passed_count=0, correct_percentage=0, points=0
+    )
 
 
 class CustomUserAdmin(UserAdmin):
@@ -20,4 +23,18 @@ class CustomUserAdmin(UserAdmin):
     actions = [delete_progress]
 
 
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'rank', 'points', 'passed_count',
+                    'correct_percentage', 'exams_count', 'updated')
+    list_select_related = ('user',)
+    ordering = ('rank',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(User, CustomUserAdmin)
+admin.site.register(UserStats, UserStatsAdmin)
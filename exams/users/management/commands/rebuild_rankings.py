@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import User, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику и позиции пользователей в рейтинге'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ranks-only',
+            action='store_true',
+            help='Пересчитать только позиции по сохраненной статистике'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, пересчитывая рейтинг через --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=3600,
+            help='Пауза между пересчетами в секундах'
+        )
+
+    def handle(self, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            try:
+                with transaction.atomic():
+                    if not options['ranks_only']:
+                        self.rebuild_stats(batch_size)
+                    UserStats.objects.update_ranks(batch_size)
+            except Exception as error:
+                if not options['loop']:
+                    raise
+                self.stderr.write(f'Ошибка пересчета рейтинга: {error}')
+            else:
+                self.stdout.write(self.style.SUCCESS('Рейтинг пересчитан'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def rebuild_stats(self, batch_size):
+        users = (
+            User.objects
+            .filter(is_active=True)
+            .with_progress()
+            .values_list(
+                'id', 'date_joined', 'exams_count', 'passed_count',
+                'correct_percentage', 'points'
+            )
+            .iterator(chunk_size=batch_size)
+        )
+        UserStats.objects.all().delete()
+        for_create = []
+
+        for user_id, joined, exams, passed, percentage, points in users:
+            for_create.append(UserStats(
+                user_id=user_id,
+                date_joined=joined,
+                exams_count=exams,
+                passed_count=passed,
+                correct_percentage=percentage or 0,
+                points=points
+            ))
+            if len(for_create) >= batch_size:
+                UserStats.objects.bulk_create(for_create)
+                for_create = []
+
+        UserStats.objects.bulk_create(for_create)
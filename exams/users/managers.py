@@ -1,14 +1,25 @@
 from django.contrib.auth.models import UserManager
 from django.db.models import (Count, ExpressionWrapper, F, IntegerField,
-                              OuterRef, Q, QuerySet, Subquery)
+                              Manager, OuterRef, Q, QuerySet, Subquery, Sum)
 from django.db.models.expressions import Window
-from django.db.models.functions.comparison import NullIf
+from django.db.models.functions.comparison import Coalesce, NullIf
 from django.db.models.functions.window import DenseRank
 
+RANKING_ORDER = (
+    '-points', '-passed_count', '-correct_percentage', '-exams_count',
+    'date_joined'
+)
+
 
 class UserQuerySet(QuerySet):
 
     def with_progress(self) -> object:
+        states_model = self.model._meta.get_field('exam_states').related_model
+        passed_states = (
+            states_model.objects
+            .filter(user=OuterRef('id'), passed=True)
+            .values('user')
+        )
         progress = (
             self
             .annotate(
@@ -16,21 +27,12 @@ class UserQuerySet(QuerySet):
                     progression__user_id=F('id'),
                     progression__finished__isnull=False
                 )),
-                passed_count=Count(
-                    'progression__exam', distinct=True, filter=Q(
-                        progression__id__in=Subquery(
-                            self
-                            .filter(progression__user_id=OuterRef('id'))
-                            .order_by(
-                                'progression__exam__id',
-                                '-progression__started'
-                            )
-                            .distinct('progression__exam__id')
-                            .values('progression__id')
-                        ),
-                        progression__user_id=F('id'),
-                        progression__passed=True
-                    )),
+                passed_count=Coalesce(Subquery(
+                    passed_states
+                    .annotate(count=Count('id'))
+                    .values('count'),
+                    output_field=IntegerField()
+                ), 0),
                 correct_percentage=ExpressionWrapper(NullIf(
                     Count('progression__answers', distinct=True, filter=Q(
                         progression__user_id=F('id'),
@@ -42,22 +44,12 @@ class UserQuerySet(QuerySet):
                             progression__user_id=F('id'),
                         )), 0), output_field=IntegerField()
                 ),
-                points=ExpressionWrapper(
-                    Count('progression__answers', distinct=True, filter=Q(
-                        progression__id__in=Subquery(
-                            self
-                            .filter(progression__user_id=OuterRef('id'))
-                            .order_by(
-                                'progression__exam__id',
-                                '-progression__started'
-                            )
-                            .distinct('progression__exam__id')
-                            .values('progression__id')
-                        ),
-                        progression__answers__correct=True,
-                        progression__passed=True
-                    )) * 10, output_field=IntegerField()
-                )
+                points=Coalesce(Subquery(
+                    passed_states
+                    .annotate(points=Sum('correct_count') * 10)
+                    .values('points'),
+                    output_field=IntegerField()
+                ), 0)
             )
         )
         return progress
@@ -91,3 +83,93 @@ class UserManager(UserManager):
 
     def get_rank(self):
         return self.get_queryset().get_rank()
+
+
+class UserStatsQuerySet(QuerySet):
+
+    def ranked(self) -> object:
+        """Ordered by the current stats, the stored rank is only a label."""
+        ranked = (
+            self
+            .filter(user__is_active=True)
+            .order_by(*RANKING_ORDER)
+        )
+        return ranked
+
+
+class UserStatsManager(Manager):
+
+    def get_queryset(self):
+        return UserStatsQuerySet(self.model, using=self._db)
+
+    def ranked(self):
+        return self.get_queryset().ranked()
+
+    def refresh(self, user: object) -> object:
+        user_model = self.model._meta.get_field('user').related_model
+        values = (
+            user_model.objects
+            .filter(id=user.id)
+            .with_progress()
+            .values(
+                'date_joined', 'exams_count', 'passed_count',
+                'correct_percentage', 'points'
+            )
+            .first()
+        )
+        values['correct_percentage'] = values['correct_percentage'] or 0
+        stats, _ = self.update_or_create(user_id=user.id, defaults=values)
+        return stats
+
+    def refresh_users(self, user_ids: list) -> None:
+        """Bulk refresh() of existing rows, used after progress is purged."""
+        user_model = self.model._meta.get_field('user').related_model
+        fields = ('exams_count', 'passed_count', 'correct_percentage',
+                  'points')
+        values = (
+            user_model.objects
+            .filter(id__in=user_ids)
+            .with_progress()
+            .values_list('id', *fields)
+        )
+        self.bulk_update([
+            self.model(
+                user_id=user_id, exams_count=exams, passed_count=passed,
+                correct_percentage=percentage or 0, points=points
+            )
+            for user_id, exams, passed, percentage, points in values
+        ], fields)
+
+    def position(self, user: object) -> int or None:
+        """Rank shown on the rankings page, refreshed by update_ranks()."""
+        return (
+            self
+            .filter(user_id=user.id)
+            .values_list('rank', flat=True)
+            .first()
+        )
+
+    def update_ranks(self, batch_size: int = 1000) -> None:
+        ranks = (
+            self
+            .filter(user__is_active=True)
+            .annotate(new_rank=Window(
+                expression=DenseRank(),
+                order_by=[
+                    F(field[1:]).desc() if field.startswith('-')
+                    else F(field).asc() for field in RANKING_ORDER
+                ]
+            ))
+            .values_list('user_id', 'new_rank')
+            .iterator(chunk_size=batch_size)
+        )
+        for_update = []
+
+        for user_id, rank in ranks:
+            for_update.append(self.model(user_id=user_id, rank=rank))
+            if len(for_update) >= batch_size:
+                self.bulk_update(for_update, ['rank'])
+                for_update = []
+
+        self.bulk_update(for_update, ['rank'])
+        self.filter(user__is_active=False).update(rank=None)
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='users.user', verbose_name='Пользователь')),
+                ('date_joined', models.DateTimeField(verbose_name='Дата регистрации')),
+                ('exams_count', models.PositiveIntegerField(default=0, verbose_name='Завершено тестов')),
+                ('passed_count', models.PositiveIntegerField(default=0, verbose_name='Зачтено')),
+                ('correct_percentage', models.PositiveIntegerField(default=0, verbose_name='Процент верных ответов')),
+                ('points', models.PositiveIntegerField(default=0, verbose_name='Баллов')),
+                ('rank', models.PositiveIntegerField(blank=True, db_index=True, null=True, verbose_name='Позиция в рейтинге')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userstats',
+            index=models.Index(fields=['-points', '-passed_count', '-correct_percentage', '-exams_count', 'date_joined'], name='users_stats_ranking_idx'),
+        ),
+    ]
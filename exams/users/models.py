@@ -2,7 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.urls import reverse
 
-from .managers import UserManager
+from .managers import RANKING_ORDER, UserManager, UserStatsManager
 
 
 class User(AbstractUser):
@@ -31,15 +31,7 @@ class User(AbstractUser):
 
     @property
     def position_of_rankings(self):
-        ranks = (
-            User.objects
-            .filter(is_active=True)
-            .with_progress()
-            .get_rank()
-            .order_by('rank')
-            .values_list('id', flat=True)
-        )
-        return list(ranks).index(self.id) + 1
+        return UserStats.objects.position(self)
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -52,5 +44,59 @@ class User(AbstractUser):
         return self.email
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         self.email = self.email.lower()
         super().save(*args, **kwargs)
+        if adding:
+            UserStats.objects.create(user=self, date_joined=self.date_joined)
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        related_name='stats',
+        primary_key=True,
+        on_delete=models.CASCADE
+    )
+    date_joined = models.DateTimeField(
+        verbose_name='Дата регистрации'
+    )
+    exams_count = models.PositiveIntegerField(
+        verbose_name='Завершено тестов',
+        default=0
+    )
+    passed_count = models.PositiveIntegerField(
+        verbose_name='Зачтено',
+        default=0
+    )
+    correct_percentage = models.PositiveIntegerField(
+        verbose_name='Процент верных ответов',
+        default=0
+    )
+    points = models.PositiveIntegerField(
+        verbose_name='Баллов',
+        default=0
+    )
+    rank = models.PositiveIntegerField(
+        verbose_name='Позиция в рейтинге',
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    updated = models.DateTimeField(
+        verbose_name='Дата обновления',
+        auto_now=True
+    )
+
+    objects = UserStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+        indexes = [
+            models.Index(fields=RANKING_ORDER, name='users_stats_ranking_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} (points: {self.points})'
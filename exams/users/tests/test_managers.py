@@ -0,0 +1,26 @@
+from django.test import TestCase
+
+from users.models import User, UserStats
+
+
+class RankedTest(TestCase):
+
+    def test_ranked_follows_current_stats(self):
+        users = [
+            User.objects.create_user(
+                username=f'user{number}', email=f'user{number}@example.com'
+            )
+            for number in range(3)
+        ]
+        for user, points, rank in zip(users, (10, 30, 20), (1, 2, None)):
+            UserStats.objects.update_or_create(
+                user=user, defaults={
+                    'date_joined': user.date_joined, 'points': points,
+                    'rank': rank
+                }
+            )
+
+        self.assertEqual(
+            list(UserStats.objects.ranked().values_list('user', flat=True)),
+            [users[1].id, users[2].id, users[0].id]
+        )
@@ -7,7 +7,7 @@ from django.views.generic import CreateView, DetailView, ListView, UpdateView
 from exams.models import Exam
 
 from .forms import SignupForm
-from .models import User
+from .models import User, UserStats
 
 
 class SignupView(CreateView):
@@ -67,20 +67,19 @@ class UserEditView(LoginRequiredMixin, UpdateView):
 
 
 class RankingListView(ListView):
-    model = User
+    model = UserStats
     template_name = 'users/rankings.html'
-    context_object_name = 'users'
+    context_object_name = 'rankings'
     paginate_by = 50
 
     def get_queryset(self):
         queryset = (
-            User.objects
-            .filter(is_active=True)
-            .with_progress()
-            .get_rank()
+            UserStats.objects
+            .ranked()
+            .select_related('user')
             .only(
-                'username', 'date_joined', 'about', 'first_name', 'last_name'
+                'rank', 'exams_count', 'passed_count', 'correct_percentage',
+                'points', 'user__username'
             )
-            .order_by('rank')
         )
         return queryset